@@ -0,0 +1,674 @@
+"""Vectorized Monte Carlo engine: the same model as run_financial_simulation,
+stepped one year at a time across many paths at once with NumPy.
+
+Every parameter can be a scalar or a per-path array of shape (n_paths,), so a
+single call can mix many different parameter settings (e.g. all the points of
+a sensitivity design, each repeated for several paths). Parameters are
+addressed by flat names:
+
+- person and run settings: 'initial_income', 'initial_expenditure',
+  'initial_capital', 'current_age', 'future_age', 'luck' (-1 unlucky,
+  0 neutral, 1 lucky; fractional values interpolate) and
+  'expenditure_to_income_ratio' (if set, overrides 'initial_expenditure');
+- financial assumptions, by their key in simulation_core.financial_params
+  (e.g. 'base_equity_return_rate', 'inflation_rate');
+- retirement drawdown settings, by their key in retirement_params (e.g.
+  'withdrawal_strategy', 'withdrawal_rate');
+- correlations between the annual shocks, as 'shock_correlation.<event>.<event>'
+  (see shock_correlation);
+- chaos event parameters, by their dotted path in chaos_events, with tuple
+  elements indexed by position (e.g. 'job_loss.prob',
+  'market_crash.return_range.0').
+"""
+import numpy as np
+
+from simulation_core import chaos_events, financial_params
+
+LUCK_VALUES = {'unlucky': -1.0, 'neutral': 0.0, 'lucky': 1.0}
+
+person_params = {
+    'initial_income': 20.0,
+    'initial_expenditure': 4.0,
+    'initial_capital': 20.0,
+    'current_age': 26,
+    'future_age': 60,
+    'luck': 0.0,
+    'expenditure_to_income_ratio': None
+}
+
+# How spending is funded after retirement_age:
+# - 'expenditure': keep spending the (inflating) pre-retirement expenditure;
+# - 'fixed_real': withdraw withdrawal_rate x savings at retirement, then the
+#   same amount grown with inflation each year (the "4% rule");
+# - 'percentage': withdraw withdrawal_rate x current savings every year;
+# - 'guardrails': like fixed_real, but cut the withdrawal by
+#   guardrail_adjustment when it exceeds withdrawal_rate x (1 + guardrail_band)
+#   of current savings, and raise it by the same step below (1 - guardrail_band);
+# - 'bucket': like fixed_real, but bucket_years of withdrawals are held in
+#   fixed deposits and spent first; the bucket is refilled from the rest of the
+#   portfolio except in market crash years.
+WITHDRAWAL_STRATEGIES = {'expenditure': 0, 'fixed_real': 1, 'percentage': 2, 'guardrails': 3, 'bucket': 4}
+
+retirement_params = {
+    'withdrawal_strategy': 'expenditure',
+    'withdrawal_rate': 0.04,
+    'guardrail_band': 0.20,
+    'guardrail_adjustment': 0.10,
+    'bucket_years': 2.0
+}
+
+# Gaussian copula over the annual shock draws: each year every path draws one
+# correlated standard normal per event in SHOCK_EVENTS, and an event fires when
+# the normal's CDF falls below the event's probability. Marginal event
+# probabilities are unchanged; these latent correlations make crashes, layoffs,
+# medical emergencies and black swans cluster in the same years. All zero
+# (the default) means independent events, drawn exactly as before.
+SHOCK_EVENTS = ('market_crash', 'job_loss', 'medical_emergency', 'black_swan')
+
+shock_correlation = {
+    'market_crash': {'job_loss': 0.0, 'medical_emergency': 0.0, 'black_swan': 0.0},
+    'job_loss': {'medical_emergency': 0.0, 'black_swan': 0.0},
+    'medical_emergency': {'black_swan': 0.0}
+}
+
+# Causes tracked by simulate_batch(attribution=True). Each is the cause's direct
+# effect on savings, in lakhs, summed over the years it happened (negative for
+# losses, positive for windfalls), not compounded:
+# - 'job_loss': post-tax income not earned while unemployed, and the shortfall
+#   against the pre-loss salary while recovering;
+# - 'market_crash': equity returns below the normal rate in crash years;
+# - 'black_swan' / 'divorce': the one-off savings hit (and, for divorce, that
+#   year's post-tax income cut);
+# - 'children': birth, education and marriage costs;
+# - 'medical_emergency', 'family_expense', 'business_venture', 'inheritance':
+#   the costs paid, the venture's net result, the amount received.
+ATTRIBUTION_CAUSES = ('job_loss', 'medical_emergency', 'market_crash', 'family_expense', 'black_swan',
+                      'children', 'divorce', 'business_venture', 'inheritance')
+
+INTEGER_PARAMS = ('current_age', 'future_age', 'retirement_age', 'withdrawal_strategy')
+
+
+def flatten_events(events):
+    """Flatten a chaos_events-style dict into {'event.key[.index]': number}."""
+    flat = {}
+
+    def visit(prefix, value):
+        if isinstance(value, dict):
+            for key, item in value.items():
+                visit(f"{prefix}.{key}" if prefix else key, item)
+        elif isinstance(value, (list, tuple)):
+            for index, item in enumerate(value):
+                visit(f"{prefix}.{index}", item)
+        else:
+            flat[prefix] = value
+
+    visit('', events)
+    return flat
+
+
+def default_params(events=None):
+    """Every parameter the batch engine understands, with its default value."""
+    params = dict(person_params)
+    params.update(financial_params)
+    params.update(retirement_params)
+    params.update(flatten_events({'shock_correlation': shock_correlation}))
+    params.update(flatten_events(chaos_events if events is None else events))
+    return params
+
+
+def _strategy_codes(value):
+    """Map a strategy name (or a per-path sequence of names) to WITHDRAWAL_STRATEGIES codes."""
+    names = np.asarray(value)
+    if names.dtype.kind not in 'US':
+        return value
+    unknown = set(np.unique(names).tolist()) - set(WITHDRAWAL_STRATEGIES)
+    if unknown:
+        raise ValueError(f"Unknown withdrawal strategy '{sorted(unknown)[0]}', expected one of {', '.join(WITHDRAWAL_STRATEGIES)}")
+    codes = np.vectorize(WITHDRAWAL_STRATEGIES.get, otypes=[np.int64])(names)
+    return codes if codes.ndim else int(codes)
+
+
+def resolve_params(overrides=None, events=None):
+    """Merge overrides into the defaults, rejecting unknown names and mapping luck and strategy names to numbers."""
+    params = default_params(events)
+    for name, value in (overrides or {}).items():
+        if name == 'luck_factor':
+            name, value = 'luck', LUCK_VALUES.get(value, 0.0)
+        if name not in params:
+            raise KeyError(f"Unknown simulation parameter '{name}'")
+        params[name] = value
+    if isinstance(params['luck'], str):
+        params['luck'] = LUCK_VALUES.get(params['luck'], 0.0)
+    params['withdrawal_strategy'] = _strategy_codes(params['withdrawal_strategy'])
+    if params['expenditure_to_income_ratio'] is not None:
+        params['initial_expenditure'] = np.multiply(params['initial_income'], params['expenditure_to_income_ratio'])
+    return params
+
+
+class TiledGenerator:
+    """Random source that repeats the same `block` draws across consecutive blocks of paths.
+
+    Passing it as simulate_batch's rng gives every block of `block` paths the
+    same random numbers, i.e. common random numbers across parameter points
+    laid out as consecutive blocks. Differences between points then come from
+    the parameters alone, not from sampling noise.
+    """
+
+    def __init__(self, rng, block):
+        self.rng = rng
+        self.block = block
+
+    def _tile(self, draws, n):
+        if n % self.block:
+            raise ValueError(f"{n} paths is not a multiple of the block size {self.block}")
+        return np.tile(draws, n // self.block)
+
+    def random(self, n):
+        return self._tile(self.rng.random(self.block), n)
+
+    def integers(self, low, high, n):
+        return self._tile(self.rng.integers(low, high, self.block), n)
+
+
+def _as_path_array(value, n_paths, dtype=float):
+    array = np.asarray(value, dtype=dtype)
+    if array.ndim == 0:
+        return np.full(n_paths, array, dtype=dtype)
+    if array.shape != (n_paths,):
+        raise ValueError(f"Per-path parameter has shape {array.shape}, expected ({n_paths},)")
+    return array
+
+
+def _uniform(rng, low, high, n_paths):
+    return low + (high - low) * rng.random(n_paths)
+
+
+def _randint(rng, low, high, n_paths):
+    """Inclusive integer draw like random.randint, with per-path bounds."""
+    return np.floor(low + (high - low + 1) * rng.random(n_paths)).astype(np.int64)
+
+
+def _shock_cholesky(ev, n_paths):
+    """Cholesky factor of the shock correlation matrix: (k, k) if shared by all paths, (n_paths, k, k) if
+    it varies per path, or None when every correlation is zero."""
+    pairs = [(i, j, ev[f'shock_correlation.{a}.{b}'])
+             for i, a in enumerate(SHOCK_EVENTS) for j, b in enumerate(SHOCK_EVENTS) if i < j]
+    if n_paths == 0 or not any(values.any() for _, _, values in pairs):
+        return None
+    shared = all((values == values[0]).all() for _, _, values in pairs)
+    corr = np.tile(np.eye(len(SHOCK_EVENTS)), (1 if shared else n_paths, 1, 1))
+    for i, j, values in pairs:
+        corr[:, i, j] = corr[:, j, i] = values[0] if shared else values
+    try:
+        cholesky = np.linalg.cholesky(corr)
+    except np.linalg.LinAlgError:
+        raise ValueError("Shock correlation matrix is not positive definite")
+    return cholesky[0] if shared else cholesky
+
+
+def _correlated_uniforms(rng, cholesky, n_paths):
+    """One (n_paths, len(SHOCK_EVENTS)) matrix of uniforms, correlated through a Gaussian copula."""
+    from scipy.special import ndtr, ndtri # Only correlated runs need SciPy
+
+    draws = np.stack([rng.random(n_paths) for _ in SHOCK_EVENTS], axis=1)
+    normals = ndtri(np.clip(draws, 1e-16, 1 - 1e-16))
+    if cholesky.ndim == 2:
+        normals = normals @ cholesky.T
+    else:
+        normals = np.einsum('nij,nj->ni', cholesky, normals)
+    return ndtr(normals)
+
+
+MONTHS_PER_YEAR = 12
+
+
+def path_params(n_paths, params=None, events=None):
+    """Resolve `params` (see resolve_params) and broadcast each value to a per-path array."""
+    p = resolve_params(params, events)
+    return {name: (_as_path_array(value, n_paths) if name not in INTEGER_PARAMS else _as_path_array(value, n_paths, np.int64))
+            for name, value in p.items() if value is not None}
+
+
+def period_prob(annual_prob, periods_per_year=1):
+    """Per-period hazard 1 - (1 - p)^(1/periods) of an event with annual probability `annual_prob`."""
+    annual_prob = np.clip(annual_prob, 0, 1)
+    if periods_per_year == 1:
+        return annual_prob
+    return 1 - (1 - annual_prob) ** (1 / periods_per_year)
+
+
+def period_rate(annual_rate, periods_per_year=1):
+    """Per-period rate compounding to `annual_rate` over a year."""
+    if periods_per_year == 1:
+        return annual_rate
+    return (1 + annual_rate) ** (1 / periods_per_year) - 1
+
+
+class LifeState:
+    """Per-path state of a batch of lives, and the life events that change it.
+
+    Shared by simulate_batch (one period per year) and
+    monthly_engine.simulate_monthly (twelve), so each event is modelled once.
+    The engines decide when in the year each event happens and pass in its
+    per-period probability (see period_prob). Each event method draws its own
+    random numbers, updates the state in place and returns what the event
+    cost or brought in, per path, for attribution.
+    """
+
+    def __init__(self, ev, n_paths, rng, periods_per_year=1):
+        self.ev = ev
+        self.n_paths = n_paths
+        self.rng = rng
+        self.periods_per_year = periods_per_year
+        self.cholesky = _shock_cholesky(ev, n_paths)
+        self.bad_luck = 1 - 0.25 * ev['luck'] # Multiplier on adverse-event probabilities
+        self.good_luck = 1 + 0.25 * ev['luck'] # Multiplier on favourable-event probabilities
+
+        self.savings = ev['initial_capital'].copy()
+        self.income = ev['initial_income'].copy()
+        self.expenditure = ev['initial_expenditure'].copy()
+        self.debt = np.zeros(n_paths)
+
+        # Children: up to two, birth years relative to the start of the simulation.
+        num_children = rng.integers(0, 3, n_paths)
+        first_birth = rng.integers(2, 7, n_paths)
+        second_birth = _randint(rng, np.maximum(first_birth + 1, 6), 9, n_paths)
+        no_child = np.iinfo(np.int64).max // 2
+        self.birth_years = np.stack([
+            np.where(num_children >= 1, first_birth, no_child),
+            np.where(num_children == 2, second_birth, no_child),
+        ], axis=1)
+        self.education_spent = np.zeros((n_paths, 2), dtype=bool)
+        self.marriage_spent = np.zeros((n_paths, 2), dtype=bool)
+
+        self.job_loss_months = np.zeros(n_paths, dtype=np.int64)
+        self.job_recovery_periods = np.zeros(n_paths, dtype=np.int64)
+        self.income_before_job_loss = np.zeros(n_paths)
+        self.crash_periods = np.zeros(n_paths, dtype=np.int64) # Periods left at the crash return
+        self.crash_blocked_periods = np.zeros(n_paths, dtype=np.int64) # Periods before another crash can start
+        self.crash_rate = np.zeros(n_paths)
+
+        self.inheritance_received = np.zeros(n_paths, dtype=bool)
+        self.business_taken = np.zeros(n_paths, dtype=bool)
+        self.divorced = np.zeros(n_paths, dtype=bool)
+        self.black_swan_hit = np.zeros(n_paths, dtype=bool)
+        self.married_year = rng.integers(2, 7, n_paths)
+
+        self.reached_retirement = np.zeros(n_paths, dtype=bool)
+        self.in_debt_at_retirement = np.zeros(n_paths, dtype=bool)
+        self.ruin_age = np.full(n_paths, np.nan)
+
+    def shocks(self):
+        """This period's shock draws as a function of the event: drawn jointly through the copula, or one
+        independent draw per event as it comes up."""
+        if self.cholesky is None:
+            return lambda event: self.rng.random(self.n_paths)
+        shocks = _correlated_uniforms(self.rng, self.cholesky, self.n_paths)
+        return lambda event: shocks[:, SHOCK_EVENTS.index(event)]
+
+    def in_job_loss(self):
+        return (self.job_loss_months > 0) | (self.job_recovery_periods > 0)
+
+    def medical_prob(self, age):
+        """Annual medical emergency probability at `age`."""
+        ev = self.ev
+        return (ev['medical_emergency.base_prob'] + age * ev['medical_emergency.age_factor']) * self.bad_luck
+
+    def child_births(self, year):
+        """Pay for children born in `year`; returns the cost and each child's age (-1 before birth)."""
+        ev = self.ev
+        born_now = self.birth_years == year
+        cost = (born_now * _uniform(self.rng, ev['child_birth.cost_range_lakhs.0'], ev['child_birth.cost_range_lakhs.1'], self.n_paths)[:, None]).sum(axis=1)
+        self.savings -= cost
+        return cost, np.where(year >= self.birth_years, year - self.birth_years, -1)
+
+    def children_milestones(self, child_ages, working):
+        """Education (at 18) and marriage (at the start of the window), once per child; returns both costs."""
+        ev = self.ev
+        education = working[:, None] & ~self.education_spent & (child_ages == 18)
+        education_cost = education.sum(axis=1) * ev['children_education.cost_per_child_lakhs']
+        self.savings -= education_cost
+        self.education_spent |= education
+        marriage = working[:, None] & ~self.marriage_spent & (child_ages == ev['children_marriage.age_window.0'][:, None])
+        marriage_cost = marriage.sum(axis=1) * ev['children_marriage.cost_per_child_lakhs']
+        self.savings -= marriage_cost
+        self.marriage_spent |= marriage
+        return education_cost, marriage_cost
+
+    def medical_emergency(self, draw, prob, active):
+        ev = self.ev
+        medical = (draw < prob) & active
+        cost = medical * _uniform(self.rng, ev['medical_emergency.cost_range_lakhs.0'], ev['medical_emergency.cost_range_lakhs.1'], self.n_paths)
+        self.savings -= cost
+        return cost
+
+    def market_crash(self, draw, prob, active, base_rate):
+        """Start a crash unless one is running or the market is still recovering.
+
+        A crash earns its drawn annual return over the year's periods, then
+        blocks new crashes for its drawn recovery years. Returns the mask of
+        crashes starting now and each path's equity return for the period.
+        """
+        ev = self.ev
+        periods = self.periods_per_year
+        crash = active & (self.crash_periods == 0) & (self.crash_blocked_periods == 0) & (draw < prob)
+        crash_return = period_rate(_uniform(self.rng, ev['market_crash.return_range.0'], ev['market_crash.return_range.1'], self.n_paths), periods)
+        recovery_years = _randint(self.rng, ev['market_crash.recovery_years_range.0'], ev['market_crash.recovery_years_range.1'], self.n_paths)
+        self.crash_rate = np.where(crash, crash_return, self.crash_rate)
+        self.crash_periods = np.where(crash, periods, self.crash_periods)
+        self.crash_blocked_periods = np.where(crash, periods * (recovery_years + 1), self.crash_blocked_periods)
+        equity_rate = np.where(self.crash_periods > 0, self.crash_rate, base_rate)
+        self.crash_periods = np.maximum(self.crash_periods - 1, 0)
+        self.crash_blocked_periods = np.maximum(self.crash_blocked_periods - 1, 0)
+        return crash, equity_rate
+
+    def job_loss(self, draw, prob, working, loss_period_counts=False):
+        """Start a job loss, count down an ongoing one, or move salary along its recovery.
+
+        A loss lasts its drawn number of months, after which salary restarts at
+        a drawn fraction of the old one and climbs back over the drawn recovery
+        years. The period in which a loss starts is unpaid; with
+        `loss_period_counts` it also counts towards the drawn months, otherwise
+        (the scalar engine's annual convention) the months run from the next
+        period. Returns the masks of paths without pay this period and of
+        paths whose salary is recovering.
+        """
+        ev = self.ev
+        months = MONTHS_PER_YEAR // self.periods_per_year
+        unemployed = working & (self.job_loss_months > 0)
+        recovering = working & ~unemployed & (self.job_recovery_periods > 0)
+        new_loss = working & ~unemployed & ~recovering & (draw < prob)
+
+        self.job_loss_months = np.where(unemployed, self.job_loss_months - months, self.job_loss_months)
+        ended = unemployed & (self.job_loss_months <= 0)
+        drop = _uniform(self.rng, ev['job_loss.salary_drop_range.0'], ev['job_loss.salary_drop_range.1'], self.n_paths)
+        recovery = self.periods_per_year * _randint(self.rng, ev['job_loss.recovery_time_years_range.0'], ev['job_loss.recovery_time_years_range.1'], self.n_paths)
+        self.income_before_job_loss = np.where(new_loss, self.income, self.income_before_job_loss)
+        duration = _randint(self.rng, ev['job_loss.min_duration_months'], ev['job_loss.max_duration_months'], self.n_paths)
+        self.job_loss_months = np.where(new_loss, duration - months if loss_period_counts else duration, self.job_loss_months)
+        if loss_period_counts:
+            ended |= new_loss & (self.job_loss_months <= 0)
+        self.income = np.where(ended, self.income_before_job_loss * drop, self.income)
+        self.job_recovery_periods = np.where(ended, recovery, self.job_recovery_periods)
+
+        increment = np.divide(self.income_before_job_loss - self.income, self.job_recovery_periods, out=np.zeros(self.n_paths), where=recovering)
+        self.income = np.where(recovering, self.income + increment, self.income)
+        self.job_recovery_periods = np.where(recovering, self.job_recovery_periods - 1, self.job_recovery_periods)
+        self.income = np.where(recovering & (self.job_recovery_periods == 0), self.income_before_job_loss, self.income)
+        return unemployed | new_loss, recovering
+
+    def family_expense(self, prob, working):
+        ev = self.ev
+        family = working & (self.rng.random(self.n_paths) < prob)
+        cost = family * _uniform(self.rng, ev['family_expense.cost_range_lakhs.0'], ev['family_expense.cost_range_lakhs.1'], self.n_paths)
+        self.savings -= cost
+        return cost
+
+    def black_swan(self, draw, prob, working):
+        """Once per life: cut savings and income by the black swan multipliers. Returns the savings lost."""
+        ev = self.ev
+        swan = working & ~self.black_swan_hit & (draw < prob)
+        swan_savings = np.where(swan, self.savings * ev['black_swan.savings_loss_multiplier'], self.savings)
+        loss = self.savings - swan_savings
+        self.savings = swan_savings
+        self.income = np.where(swan, self.income * ev['black_swan.income_loss_multiplier'], self.income)
+        self.income_before_job_loss = np.where(swan & self.in_job_loss(), self.income_before_job_loss * ev['black_swan.income_loss_multiplier'],
+                                               self.income_before_job_loss)
+        self.black_swan_hit |= swan
+        return loss
+
+    def career_advancement(self, age, working):
+        ev = self.ev
+        career_prob = ev['career_advancement.prob'] * np.where(age > 35, np.maximum(0.1, 1 - (age - 35) * 0.02), 1.0)
+        advance = working & (self.job_loss_months <= 0) & (self.rng.random(self.n_paths) < np.clip(career_prob * self.good_luck, 0, 1))
+        boost = _uniform(self.rng, ev['career_advancement.salary_boost_multiplier_range.0'], ev['career_advancement.salary_boost_multiplier_range.1'], self.n_paths)
+        self.income = np.where(advance, np.minimum(self.income * boost, ev['income_cap_lakhs']), self.income)
+        self.income_before_job_loss = np.where(advance & (self.job_recovery_periods > 0), self.income_before_job_loss * boost, self.income_before_job_loss)
+
+    def inheritance(self, age, prob, working):
+        ev = self.ev
+        inheritance = (working & ~self.inheritance_received
+                       & (age >= ev['inheritance.age_window_person.0']) & (age <= ev['inheritance.age_window_person.1'])
+                       & (self.rng.random(self.n_paths) < prob))
+        amount = inheritance * _uniform(self.rng, ev['inheritance.amount_range_lakhs.0'], ev['inheritance.amount_range_lakhs.1'], self.n_paths)
+        self.savings += amount
+        self.inheritance_received |= inheritance
+        return amount
+
+    def business_venture(self, age, prob, working):
+        """Once per life, if the investment can be paid from savings. Returns the venture's net result."""
+        ev = self.ev
+        wants_venture = (working & ~self.business_taken
+                         & (age >= ev['business_venture.age_window_person.0']) & (age <= ev['business_venture.age_window_person.1'])
+                         & (self.rng.random(self.n_paths) < prob))
+        investment = _uniform(self.rng, ev['business_venture.investment_range_lakhs.0'], ev['business_venture.investment_range_lakhs.1'], self.n_paths)
+        venture = wants_venture & (self.savings >= investment)
+        success = self.rng.random(self.n_paths) < ev['business_venture.success_prob']
+        multiplier = _uniform(self.rng, ev['business_venture.success_return_multiplier_range.0'], ev['business_venture.success_return_multiplier_range.1'], self.n_paths)
+        payback = np.where(success, multiplier, 1 - ev['business_venture.failure_loss_percentage'])
+        result = venture * investment * (payback - 1)
+        self.savings += result
+        self.business_taken |= venture
+        return result
+
+    def divorce(self, year, prob, working):
+        """Once per life, after the marriage year. Returns the divorce mask, the savings lost and the annual income cut."""
+        ev = self.ev
+        divorce = working & ~self.divorced & (year > self.married_year) & (self.rng.random(self.n_paths) < prob)
+        divorce_savings = np.where(divorce, self.savings * (1 - ev['divorce.savings_loss_percentage']), self.savings)
+        loss = self.savings - divorce_savings
+        self.savings = divorce_savings
+        income_reduction = np.where(divorce, self.income * ev['divorce.income_loss_percentage_temp'], 0.0)
+        self.income -= income_reduction
+        self.income_before_job_loss = np.where(divorce & self.in_job_loss(), self.income_before_job_loss - income_reduction,
+                                               self.income_before_job_loss)
+        self.divorced |= divorce
+        return divorce, loss, income_reduction
+
+    def salary_growth(self, age, working):
+        """Yearly raise outside unemployment and recovery, by income band and age."""
+        income_cap = self.ev['income_cap_lakhs']
+        growing = working & (self.job_loss_months <= 0) & (self.job_recovery_periods <= 0) & (self.income < income_cap)
+        growth = np.select(
+            [self.income >= 100, age < 35, age < 50],
+            [_uniform(self.rng, 1.005, 1.015, self.n_paths), _uniform(self.rng, 1.07, 1.15, self.n_paths), _uniform(self.rng, 1.04, 1.08, self.n_paths)],
+            _uniform(self.rng, 1.01, 1.03, self.n_paths))
+        self.income = np.where(growing, np.minimum(self.income * growth, income_cap), self.income)
+
+    def expenditure_growth(self, child_ages, active):
+        """Yearly growth with inflation, lifestyle and dependent children, capped at 80% of income."""
+        ev = self.ev
+        dependent_children = ((child_ages != -1) & (child_ages < 18)).sum(axis=1)
+        expenditure_growth = 1 + ev['inflation_rate'] + ev['expenditure_base_growth_rate'] + 0.03 * dependent_children
+        self.expenditure = np.where(active, self.expenditure * expenditure_growth, self.expenditure)
+        self.expenditure = np.where(active, np.minimum(self.expenditure, np.where(self.income > 0, self.income * 0.8, 100)), self.expenditure)
+
+    def settle_debt(self):
+        """Borrow to cover negative savings, or repay debt from savings when there is no shortfall."""
+        shortfall = np.maximum(-self.savings, 0)
+        self.debt += shortfall
+        self.savings = np.maximum(self.savings, 0)
+        pay_off = np.where(shortfall > 0, 0.0, np.minimum(self.debt, self.savings))
+        self.debt -= pay_off
+        self.savings -= pay_off
+
+    def note_retirement(self, retired):
+        """Mark paths retiring this period; a life that stops working in debt was not ruined by its drawdown."""
+        self.in_debt_at_retirement |= retired & ~self.reached_retirement & (self.debt > 0)
+        self.reached_retirement |= retired
+
+    def note_ruin(self, retired, age):
+        """Stamp the age at which savings first run out after a solvent retirement."""
+        ruined = retired & ~self.in_debt_at_retirement & (self.debt > 0) & np.isnan(self.ruin_age)
+        self.ruin_age = np.where(ruined, age, self.ruin_age)
+
+
+def simulate_batch(n_paths, params=None, rng=None, record=False, events=None, on_year=None, attribution=False):
+    """Simulate `n_paths` independent lives.
+
+    `params` maps parameter names (see module docstring) to scalars or per-path
+    arrays; anything not given uses the defaults from simulation_core. Returns a
+    dict of per-path arrays: 'final_savings', 'final_debt', 'debt_years' (years
+    ending with outstanding debt), 'years', 'reached_retirement' (lived past
+    retirement_age within the horizon), 'in_debt_at_retirement' (already
+    in debt in the first retired year) and 'ruin_age' (the age at which
+    savings first ran out after retirement, NaN if they never did or if the
+    life was already in debt at retirement). With
+    record=True it also returns (n_paths, max_years + 1) matrices
+    'total_savings', 'total_debt', 'income' and 'expenditure', NaN past each
+    path's horizon.
+
+    With attribution=True it also returns 'attribution': {cause: per-path
+    array} for every cause in ATTRIBUTION_CAUSES.
+
+    `on_year(year, active, state)` is called for year 0 and after every
+    simulated year, with the mask of paths still inside their horizon and the
+    current 'total_savings', 'total_debt', 'income' and 'expenditure' arrays
+    (live engine state: read, don't modify or keep). It lets callers reduce the
+    yearly values as they go instead of recording whole matrices.
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    ev = path_params(n_paths, params, events)
+
+    current_age = ev['current_age']
+    years = ev['future_age'] - current_age
+    max_years = int(years.max()) if n_paths else 0
+
+    life = LifeState(ev, n_paths, rng)
+    debt_years = np.zeros(n_paths, dtype=np.int64)
+
+    # Retirement drawdown
+    strategy = ev['withdrawal_strategy']
+    drawing_down = np.zeros(n_paths, dtype=bool)
+    withdrawal = np.zeros(n_paths)
+    cash_bucket = np.zeros(n_paths)
+
+    final_savings = life.savings.copy()
+    final_debt = life.debt.copy()
+    impact = {cause: np.zeros(n_paths) for cause in ATTRIBUTION_CAUSES} if attribution else None
+
+    if record:
+        shape = (n_paths, max_years + 1)
+        history = {name: np.full(shape, np.nan) for name in ('total_savings', 'total_debt', 'income', 'expenditure')}
+        history['total_savings'][:, 0] = life.savings
+        history['total_debt'][:, 0] = life.debt
+        history['income'][:, 0] = life.income
+        history['expenditure'][:, 0] = life.expenditure
+
+    if on_year is not None:
+        on_year(0, years >= 0, {'total_savings': life.savings, 'total_debt': life.debt, 'income': life.income, 'expenditure': life.expenditure})
+
+    for year in range(1, max_years + 1):
+        active = year <= years
+        age = current_age + year
+        working = (age <= ev['retirement_age']) & active
+
+        year_income = np.where(working, life.income, 0.0)
+        birth_cost, child_ages = life.child_births(year)
+        year_expenditure = life.expenditure.copy()
+
+        shock = life.shocks()
+        medical_cost = life.medical_emergency(shock('medical_emergency'), period_prob(life.medical_prob(age)), active)
+        crash, equity_rate = life.market_crash(shock('market_crash'), period_prob(ev['market_crash.prob'] * life.bad_luck), active,
+                                               ev['base_equity_return_rate'])
+
+        jobless, recovering_job = life.job_loss(shock('job_loss'), period_prob(ev['job_loss.prob'] * life.bad_luck), working)
+        lost_income = np.where(jobless, year_income, 0.0) + np.where(recovering_job, life.income_before_job_loss - year_income, 0.0)
+        year_income = np.where(jobless, 0.0, year_income)
+
+        family_cost = life.family_expense(period_prob(ev['family_expense.prob']), working)
+        swan_loss = life.black_swan(shock('black_swan'), period_prob(ev['black_swan.prob'] / np.maximum(years, 1)), working)
+        education_cost, marriage_cost = life.children_milestones(child_ages, working)
+        life.career_advancement(age, working)
+        inheritance_amount = life.inheritance(age, period_prob(ev['inheritance.prob_in_window_annual']), working)
+        venture_result = life.business_venture(age, period_prob(ev['business_venture.prob_in_window_annual']), working)
+        divorce, divorce_loss, income_reduction = life.divorce(year, period_prob(ev['divorce.prob_if_married_annual']), working)
+        year_income = np.where(divorce, life.income, year_income)
+
+        retired = active & ~working
+        life.note_retirement(retired)
+        year_income = np.where(retired, 0.0, year_income)
+        life.income = np.where(retired, 0.0, life.income)
+        savings = life.savings
+
+        # Withdrawal for the year under each path's strategy
+        policy = retired & (strategy != WITHDRAWAL_STRATEGIES['expenditure'])
+        starting = policy & ~drawing_down
+        withdrawal = np.where(starting, ev['withdrawal_rate'] * np.maximum(savings, 0), withdrawal * (1 + ev['inflation_rate']))
+        drawing_down |= starting
+        current_rate = np.divide(withdrawal, savings, out=np.full(n_paths, np.inf), where=savings > 0)
+        guarded = (strategy == WITHDRAWAL_STRATEGIES['guardrails']) & policy & ~starting
+        withdrawal = np.where(guarded & (current_rate > ev['withdrawal_rate'] * (1 + ev['guardrail_band'])),
+                              withdrawal * (1 - ev['guardrail_adjustment']), withdrawal)
+        withdrawal = np.where(guarded & (current_rate < ev['withdrawal_rate'] * (1 - ev['guardrail_band'])),
+                              withdrawal * (1 + ev['guardrail_adjustment']), withdrawal)
+        withdrawal = np.where(strategy == WITHDRAWAL_STRATEGIES['percentage'], ev['withdrawal_rate'] * np.maximum(savings, 0), withdrawal)
+        withdrawal = np.where(policy, withdrawal, 0.0)
+        year_expenditure = np.where(policy, withdrawal, year_expenditure)
+
+        bucketed = policy & (strategy == WITHDRAWAL_STRATEGIES['bucket'])
+        cash_bucket = np.where(bucketed & starting, ev['bucket_years'] * withdrawal, cash_bucket)
+        cash_bucket = np.where(bucketed, np.clip(cash_bucket, 0, np.maximum(savings, 0)), 0.0)
+
+        # Cash flow, returns and debt
+        savings_this_year = year_income * (1 - ev['tax_rate']) - year_expenditure
+        investable = savings + np.maximum(savings_this_year, 0)
+        portfolio_rate = ev['equity_allocation'] * equity_rate + ev['fd_allocation'] * ev['base_fd_return_rate']
+        returns = np.where(
+            investable > 0,
+            (investable - cash_bucket) * portfolio_rate + cash_bucket * ev['base_fd_return_rate'],
+            0.0)
+        life.savings = savings + (savings_this_year + returns) * active
+
+        if attribution:
+            after_tax = 1 - ev['tax_rate']
+            crash_loss = np.where(crash & (investable > 0),
+                                  (investable - cash_bucket) * ev['equity_allocation'] * (ev['base_equity_return_rate'] - equity_rate), 0.0)
+            impact['job_loss'] -= lost_income * after_tax * working
+            impact['medical_emergency'] -= medical_cost
+            impact['market_crash'] -= crash_loss * active
+            impact['family_expense'] -= family_cost
+            impact['black_swan'] -= swan_loss
+            impact['children'] -= birth_cost + education_cost + marriage_cost
+            impact['divorce'] -= divorce_loss + income_reduction * after_tax
+            impact['business_venture'] += venture_result
+            impact['inheritance'] += inheritance_amount
+        cash_bucket = np.maximum(cash_bucket * (1 + ev['base_fd_return_rate']) - withdrawal, 0) * bucketed
+
+        life.settle_debt()
+        life.note_ruin(retired, age)
+        # Top the bucket back up from the portfolio, except after a crash
+        cash_bucket = np.where(bucketed & ~crash, np.minimum(ev['bucket_years'] * withdrawal * (1 + ev['inflation_rate']), life.savings),
+                               np.minimum(cash_bucket, life.savings))
+
+        life.salary_growth(age, working)
+        life.expenditure_growth(child_ages, active)
+
+        debt_years += (life.debt > 0) & active
+        ends_now = years == year
+        final_savings = np.where(ends_now, life.savings, final_savings)
+        final_debt = np.where(ends_now, life.debt, final_debt)
+
+        if record:
+            history['total_savings'][active, year] = life.savings[active]
+            history['total_debt'][active, year] = life.debt[active]
+            history['income'][active, year] = life.income[active]
+            history['expenditure'][active, year] = year_expenditure[active]
+
+        if on_year is not None:
+            on_year(year, active, {'total_savings': life.savings, 'total_debt': life.debt, 'income': life.income, 'expenditure': year_expenditure})
+
+    result = {
+        'final_savings': final_savings,
+        'final_debt': final_debt,
+        'debt_years': debt_years,
+        'years': years,
+        'ruin_age': life.ruin_age,
+        'reached_retirement': life.reached_retirement,
+        'in_debt_at_retirement': life.in_debt_at_retirement,
+    }
+    if attribution:
+        result['attribution'] = impact
+    if record:
+        result.update(history)
+    return result
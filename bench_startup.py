@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""Startup-time benchmark for the API and CLI entry points.
+
+Each target is imported in a fresh interpreter (like a CLI run or a serverless
+cold start), several times, and the median wall-clock time is reported together
+with the heavy third-party modules that ended up loaded.
+
+    python bench_startup.py [--repeat N]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+TARGETS = [
+    ('baseline (python -c pass)', 'pass'),
+    ('simulation_core', 'import simulation_core'),
+    ('sensitivity_analysis (CLI)', 'import sensitivity_analysis'),
+    ('api (web app)', 'import api'),
+    ('wsgi (api + warmed engines)', 'import wsgi'),
+]
+
+HEAVY_MODULES = ('numpy', 'pandas', 'flask', 'flask_cors', 'msgpack')
+
+PROBE = (
+    "import sys\n"
+    "{statement}\n"
+    "print(','.join(m for m in {heavy!r} if m in sys.modules))"
+)
+
+
+def time_import(statement, repeat):
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    timings = []
+    loaded = ''
+    for _ in range(repeat):
+        start = time.perf_counter()
+        completed = subprocess.run(
+            [sys.executable, '-c', PROBE.format(statement=statement, heavy=HEAVY_MODULES)],
+            cwd=script_dir, capture_output=True, text=True, check=True,
+        )
+        timings.append(time.perf_counter() - start)
+        loaded = completed.stdout.strip()
+    return statistics.median(timings), loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=7, help='fresh interpreters per target (default: 7)')
+    args = parser.parse_args()
+
+    print(f"{'target':<30} {'median ms':>10}  heavy modules loaded")
+    print('-' * 70)
+    for label, statement in TARGETS:
+        median_s, loaded = time_import(statement, args.repeat)
+        print(f"{label:<30} {median_s * 1000:>10.1f}  {loaded or '-'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""Compare retirement withdrawal strategies on the batch engine.
+
+Every strategy in batch_engine.WITHDRAWAL_STRATEGIES is simulated in one
+batch, on the same random lives (common random numbers), so differences
+between strategies come from the withdrawal policy alone. For each strategy
+the comparison reports the chance that savings run out after retirement, the
+distribution of the age at which they do, and how much is left at the end.
+Lives already in debt when they retire are no strategy's doing: they are
+reported in their own 'in_debt_at_retirement' column and left out of the
+ruin figures.
+
+    python decumulation.py --future-age 95 --withdrawal-rate 0.04 --paths 20000
+"""
+import argparse
+
+import numpy as np
+
+from batch_engine import WITHDRAWAL_STRATEGIES, TiledGenerator, resolve_params, simulate_batch
+from serialization import write_csv
+
+RUIN_AGE_PERCENTILES = (10, 25, 50)
+
+
+def compare_strategies(strategies=None, paths_per_strategy=10000, params=None, seed=None, events=None):
+    """Simulate `paths_per_strategy` lives under each strategy.
+
+    Returns {'summary': columns with one row per strategy, 'ruin_by_age':
+    columns with the cumulative share of lives (%) whose savings have run out
+    by each age, one column per strategy}. Ruin shares are over the lives that
+    retire out of debt, and NaN for a strategy where none do.
+    """
+    strategies = list(strategies or WITHDRAWAL_STRATEGIES)
+    for name in strategies:
+        if name not in WITHDRAWAL_STRATEGIES:
+            raise ValueError(f"Unknown withdrawal strategy '{name}', expected one of {', '.join(WITHDRAWAL_STRATEGIES)}")
+
+    batch_params = dict(params or {})
+    batch_params['withdrawal_strategy'] = np.repeat([WITHDRAWAL_STRATEGIES[name] for name in strategies], paths_per_strategy)
+    rng = TiledGenerator(np.random.default_rng(seed), paths_per_strategy)
+    result = simulate_batch(len(strategies) * paths_per_strategy, batch_params, rng=rng, events=events)
+
+    ruin_age = result['ruin_age'].reshape(len(strategies), paths_per_strategy)
+    final_savings = result['final_savings'].reshape(len(strategies), paths_per_strategy)
+    ruined = ~np.isnan(ruin_age)
+    in_debt_at_retirement = result['in_debt_at_retirement'].reshape(len(strategies), paths_per_strategy)
+    retired = result['reached_retirement'].reshape(len(strategies), paths_per_strategy)
+    solvent = (retired & ~in_debt_at_retirement).sum(axis=1)[:, None]
+    measured = solvent > 0 # A strategy with no solvent retirees has no ruin rate, not a zero one
+
+    summary = {
+        'strategy': strategies,
+        'in_debt_at_retirement': in_debt_at_retirement.mean(axis=1),
+        'ruin_probability': _share(ruined.sum(axis=1)[:, None], solvent, measured)[:, 0],
+        'median_final_savings': np.median(final_savings, axis=1),
+        'p10_final_savings': np.percentile(final_savings, 10, axis=1),
+    }
+    for p in RUIN_AGE_PERCENTILES:
+        # Among the lives that do run out of savings
+        summary[f'ruin_age_p{p}'] = np.array([np.percentile(ages[hit], p) if hit.any() else np.nan for ages, hit in zip(ruin_age, ruined)])
+
+    resolved = resolve_params(params, events)
+    first_age = int(np.min(resolved['retirement_age'])) + 1
+    last_age = int(np.max(resolved['future_age']))
+    ages = np.arange(first_age, max(last_age, first_age) + 1)
+    ruined_by_age = (ruin_age[:, :, None] <= ages).sum(axis=1)
+    ruin_by_age = {'age': ages}
+    for index, share in enumerate(_share(ruined_by_age, solvent, measured) * 100):
+        ruin_by_age[strategies[index]] = share
+    return {'summary': summary, 'ruin_by_age': ruin_by_age}
+
+
+def _share(counts, solvent, measured):
+    """counts / solvent row by row, NaN for the strategies where no life retired out of debt."""
+    return np.divide(counts, solvent, out=np.full(counts.shape, np.nan), where=measured)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare retirement withdrawal strategies by ruin probability and ruin age.")
+    parser.add_argument('--strategies', nargs='+', choices=list(WITHDRAWAL_STRATEGIES), help="strategies to compare (default: all)")
+    parser.add_argument('--paths', type=int, default=10000, help="simulated lives per strategy (default: 10000)")
+    parser.add_argument('--income', type=float, default=20.0, help="initial annual income in lakhs (default: 20)")
+    parser.add_argument('--expenditure', type=float, default=4.0, help="initial annual expenditure in lakhs (default: 4)")
+    parser.add_argument('--capital', type=float, default=20.0, help="initial capital in lakhs (default: 20)")
+    parser.add_argument('--current-age', type=int, default=26)
+    parser.add_argument('--future-age', type=int, default=90)
+    parser.add_argument('--retirement-age', type=int, default=60)
+    parser.add_argument('--withdrawal-rate', type=float, default=0.04)
+    parser.add_argument('--luck', choices=['unlucky', 'neutral', 'lucky'], default='neutral')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--ruin-by-age', metavar='FILE', help="also write the cumulative ruin share by age to this CSV")
+    parser.add_argument('--output', default='-', help="CSV output file for the summary, or - for stdout (default: -)")
+    args = parser.parse_args(argv)
+
+    params = {
+        'initial_income': args.income,
+        'initial_expenditure': args.expenditure,
+        'initial_capital': args.capital,
+        'current_age': args.current_age,
+        'future_age': args.future_age,
+        'retirement_age': args.retirement_age,
+        'withdrawal_rate': args.withdrawal_rate,
+        'luck_factor': args.luck,
+    }
+    comparison = compare_strategies(args.strategies, args.paths, params, seed=args.seed)
+
+    write_csv(comparison['summary'], args.output)
+    if args.ruin_by_age:
+        write_csv(comparison['ruin_by_age'], args.ruin_by_age)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""Distributed sensitivity sweeps: one coordinator, any number of pull-based workers.
+
+The coordinator splits a sweep design into work units of (design cell, seed
+block) and serves them over plain HTTP/JSON. Workers on any machine lease a
+unit, simulate it on the batch engine and post back a small mergeable
+aggregate. A lease that isn't completed within `lease_timeout` seconds (the
+worker died, the network dropped) goes back on the queue for another worker.
+A unit that raises is reported back and re-queued too, but after
+`max_attempts` failed or lost leases of the same unit the sweep is aborted
+with its error rather than retried forever.
+
+Every unit draws from its own SeedSequence(seed, spawn_key=(cell, block)) and
+the coordinator merges unit aggregates in unit order, so the final table is the
+same whichever workers ran which units, and however often units were retried.
+
+    # on the coordinator machine
+    python distributed.py coordinator --dimensions '{"initial_income": {"low": 10, "high": 60, "levels": 11}}' \\
+        --paths-per-cell 100000 --port 8765 --output grid.csv
+    # on each worker machine
+    python distributed.py worker --coordinator http://coordinator-host:8765
+
+The protocol has no authentication; run it on a trusted network only.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+import urllib.request
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from batch_engine import resolve_params, simulate_batch
+from scenarios import get_scenario, load_scenario
+from serialization import write_csv
+from sweep import build_design
+
+AGGREGATE_FIELDS = ('paths', 'successes', 'debt_paths', 'sum_final_savings', 'sum_sq_final_savings', 'sum_debt_years')
+
+
+# --- Work units ---
+
+def simulate_unit(unit):
+    """Run one work unit and return its mergeable aggregate."""
+    rng = np.random.default_rng(np.random.SeedSequence(unit['seed'], spawn_key=(unit['cell'], unit['block'])))
+    params = dict(unit['fixed'])
+    params.update(unit['point'])
+    result = simulate_batch(unit['paths'], params, rng=rng, events=unit.get('events'))
+    final_savings = result['final_savings']
+    return {
+        'paths': unit['paths'],
+        'successes': int((final_savings >= unit['success_threshold_savings']).sum()),
+        'debt_paths': int((result['final_debt'] > 0).sum()),
+        'sum_final_savings': float(final_savings.sum()),
+        'sum_sq_final_savings': float((final_savings ** 2).sum()),
+        'sum_debt_years': int(result['debt_years'].sum()),
+        'min_final_savings': float(final_savings.min()),
+        'max_final_savings': float(final_savings.max()),
+    }
+
+
+def merge_aggregates(aggregates):
+    """Combine unit aggregates for one cell (sums add, extremes take min/max)."""
+    merged = {field: 0 for field in AGGREGATE_FIELDS}
+    merged['min_final_savings'] = float('inf')
+    merged['max_final_savings'] = float('-inf')
+    for aggregate in aggregates:
+        for field in AGGREGATE_FIELDS:
+            merged[field] += aggregate[field]
+        merged['min_final_savings'] = min(merged['min_final_savings'], aggregate['min_final_savings'])
+        merged['max_final_savings'] = max(merged['max_final_savings'], aggregate['max_final_savings'])
+    return merged
+
+
+# --- Coordinator ---
+
+class SweepCoordinator:
+    """Hands out work units, re-queues expired leases and merges results."""
+
+    def __init__(self, dimensions, design='factorial', num_points=None, paths_per_cell=1000, paths_per_unit=10000,
+                 fixed=None, success_threshold_savings=200, seed=0, lease_timeout=120, max_attempts=3, events=None):
+        if paths_per_cell < 1 or paths_per_unit < 1:
+            raise ValueError("paths_per_cell and paths_per_unit must be at least 1")
+        self.design = build_design(dimensions, design, num_points, seed)
+        self.num_cells = len(next(iter(self.design.values())))
+        resolve_params(fixed, events) # Bad input fails here, not in every worker
+        self.lease_timeout = lease_timeout
+        self.max_attempts = max_attempts
+        self.units = []
+        for cell in range(self.num_cells):
+            point = {name: values[cell].item() for name, values in self.design.items()}
+            for block, start in enumerate(range(0, paths_per_cell, paths_per_unit)):
+                self.units.append({
+                    'id': len(self.units),
+                    'cell': cell,
+                    'block': block,
+                    'paths': min(paths_per_unit, paths_per_cell - start),
+                    'point': point,
+                    'fixed': fixed or {},
+                    'seed': seed,
+                    'success_threshold_savings': success_threshold_savings,
+                    'events': events, # Scenario event tables (None for the defaults) travel with each unit
+                })
+        self.pending = deque(range(len(self.units)))
+        self.leases = {} # unit id -> lease deadline
+        self.attempts = [0] * len(self.units)
+        self.results = {}
+        self.error = None # Set when a unit exhausts its attempts; the sweep is then aborted
+        self.lock = threading.Lock()
+        self.finished = threading.Event()
+        if not self.units:
+            self.finished.set()
+
+    def lease(self):
+        """Next unit to run, {'wait': True} if all remaining units are leased, or {'done': True}."""
+        with self.lock:
+            if self.finished.is_set():
+                return {'done': True}
+            now = time.monotonic()
+            for unit_id, deadline in list(self.leases.items()):
+                if deadline < now: # Lost: the worker died or never reported back
+                    del self.leases[unit_id]
+                    self._retry(unit_id, f"lease expired after {self.lease_timeout:g}s")
+                    if self.finished.is_set():
+                        return {'done': True}
+            if not self.pending:
+                return {'wait': True}
+            unit_id = self.pending.popleft()
+            self.leases[unit_id] = now + self.lease_timeout
+            self.attempts[unit_id] += 1
+            return {'unit': self.units[unit_id]}
+
+    def complete(self, unit_id, aggregate):
+        """Record a unit's aggregate. Duplicate reports (from a retried lease) are ignored."""
+        with self.lock:
+            self.leases.pop(unit_id, None)
+            if unit_id in self.results:
+                return
+            self.results[unit_id] = aggregate
+            if unit_id in self.pending:
+                self.pending.remove(unit_id)
+            if len(self.results) == len(self.units):
+                self.finished.set()
+
+    def fail(self, unit_id, error):
+        """Record that a worker could not run a unit; re-queue it, or abort once it has used up its attempts."""
+        with self.lock:
+            if self.leases.pop(unit_id, None) is None or unit_id in self.results:
+                return # Stale report for a lease that already expired or completed
+            self._retry(unit_id, error)
+
+    def _retry(self, unit_id, error):
+        if self.attempts[unit_id] >= self.max_attempts:
+            self.error = f"Unit {unit_id} failed {self.attempts[unit_id]} times, last with: {error}"
+            self.finished.set()
+        else:
+            self.pending.append(unit_id)
+
+    def progress(self):
+        with self.lock:
+            return {
+                'units': len(self.units),
+                'completed': len(self.results),
+                'leased': len(self.leases),
+                'retries': sum(max(0, a - 1) for a in self.attempts),
+                'error': self.error,
+            }
+
+    def table(self):
+        """Per-cell results as columns, merged in unit order for reproducibility."""
+        if self.error is not None:
+            raise RuntimeError(f"Sweep aborted: {self.error}")
+        by_cell = [[] for _ in range(self.num_cells)]
+        for unit in self.units:
+            by_cell[unit['cell']].append(self.results[unit['id']])
+        merged = [merge_aggregates(aggregates) for aggregates in by_cell]
+
+        columns = {name: values for name, values in self.design.items()}
+        paths = np.array([m['paths'] for m in merged], dtype=float)
+        mean = np.array([m['sum_final_savings'] for m in merged]) / paths
+        columns['num_paths'] = paths.astype(np.int64)
+        columns['success_rate_pct'] = np.array([m['successes'] for m in merged]) / paths * 100
+        columns['debt_probability'] = np.array([m['debt_paths'] for m in merged]) / paths
+        columns['average_final_savings'] = mean
+        columns['std_final_savings'] = np.sqrt(np.maximum(np.array([m['sum_sq_final_savings'] for m in merged]) / paths - mean ** 2, 0))
+        columns['min_final_savings'] = np.array([m['min_final_savings'] for m in merged])
+        columns['max_final_savings'] = np.array([m['max_final_savings'] for m in merged])
+        columns['average_debt_incurred_years'] = np.array([m['sum_debt_years'] for m in merged]) / paths
+        return columns
+
+    def serve(self, host='0.0.0.0', port=8765):
+        """Start the HTTP server in a background thread and return it."""
+        coordinator = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _reply(self, payload, status=200):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if self.path == '/progress':
+                    self._reply(coordinator.progress())
+                else:
+                    self._reply({'error': 'not found'}, 404)
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                data = json.loads(self.rfile.read(length) or b'{}')
+                if self.path == '/lease':
+                    self._reply(coordinator.lease())
+                elif self.path == '/complete':
+                    coordinator.complete(int(data['unit_id']), data['aggregate'])
+                    self._reply({'ok': True})
+                elif self.path == '/fail':
+                    coordinator.fail(int(data['unit_id']), str(data.get('error', 'unknown error')))
+                    self._reply({'ok': True})
+                else:
+                    self._reply({'error': 'not found'}, 404)
+
+            def log_message(self, format, *args):
+                pass # One line per lease would drown the progress output
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+# --- Worker ---
+
+def _post(url, payload, timeout):
+    request = urllib.request.Request(url, data=json.dumps(payload).encode(), headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.loads(response.read())
+
+
+def run_worker(coordinator_url, poll_interval=0.5, timeout=30, max_errors=10):
+    """Pull and run units until the coordinator reports the sweep done. Returns the number of units run."""
+    coordinator_url = coordinator_url.rstrip('/')
+    units_run = errors = 0
+    while True:
+        try:
+            reply = _post(f"{coordinator_url}/lease", {}, timeout)
+            if reply.get('done'):
+                return units_run
+            if reply.get('wait'):
+                time.sleep(poll_interval)
+                continue
+            unit = reply['unit']
+            try:
+                aggregate = simulate_unit(unit)
+            except Exception as e: # Report it and move on; the coordinator decides whether to retry or abort
+                _post(f"{coordinator_url}/fail", {'unit_id': unit['id'], 'error': f"{type(e).__name__}: {e}"}, timeout)
+                continue
+            _post(f"{coordinator_url}/complete", {'unit_id': unit['id'], 'aggregate': aggregate}, timeout)
+            units_run += 1
+            errors = 0
+        except OSError:
+            # Coordinator unreachable; an unfinished lease simply expires and is re-queued
+            errors += 1
+            if errors >= max_errors:
+                raise
+            time.sleep(poll_interval * errors)
+
+
+def run_distributed_sweep(coordinator, host='127.0.0.1', port=8765, local_workers=0, progress=True):
+    """Serve `coordinator` until every unit is complete, optionally with worker processes on this machine."""
+    server = coordinator.serve(host, port)
+    url = f"http://{'127.0.0.1' if host in ('0.0.0.0', '') else host}:{server.server_address[1]}"
+    processes = [multiprocessing.Process(target=run_worker, args=(url,), daemon=True) for _ in range(local_workers)]
+    for process in processes:
+        process.start()
+    try:
+        while not coordinator.finished.wait(timeout=2):
+            if progress:
+                state = coordinator.progress()
+                print(f"{state['completed']}/{state['units']} units done, {state['leased']} leased, "
+                      f"{state['retries']} retried", file=sys.stderr)
+    finally:
+        for process in processes:
+            process.join(timeout=10)
+        server.shutdown()
+        server.server_close()
+    return coordinator.table()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Distributed sensitivity sweep coordinator / worker.")
+    sub = parser.add_subparsers(dest='role', required=True)
+
+    coordinator_parser = sub.add_parser('coordinator', help="split a sweep into units and serve them")
+    coordinator_parser.add_argument('--dimensions', required=True, type=json.loads,
+                                    help="sweep dimensions as JSON, e.g. '{\"initial_income\": {\"low\": 10, \"high\": 60, \"levels\": 11}}'")
+    coordinator_parser.add_argument('--design', choices=['factorial', 'lhs', 'sobol'], default='factorial')
+    coordinator_parser.add_argument('--num-points', type=int, help="points for lhs/sobol designs")
+    coordinator_parser.add_argument('--fixed', type=json.loads, default={}, help="JSON values for parameters that are not swept")
+    coordinator_parser.add_argument('--scenario', default=None,
+                                    help="scenario profile name from the scenario directory, or a path to a profile file (default: built-in events)")
+    coordinator_parser.add_argument('--paths-per-cell', type=int, default=10000)
+    coordinator_parser.add_argument('--paths-per-unit', type=int, default=10000)
+    coordinator_parser.add_argument('--success-threshold-savings', type=float, default=200)
+    coordinator_parser.add_argument('--seed', type=int, default=0)
+    coordinator_parser.add_argument('--lease-timeout', type=float, default=120, help="seconds before an unreported unit is re-queued")
+    coordinator_parser.add_argument('--max-attempts', type=int, default=3, help="failed or lost leases of one unit before the sweep is aborted")
+    coordinator_parser.add_argument('--host', default='0.0.0.0')
+    coordinator_parser.add_argument('--port', type=int, default=8765)
+    coordinator_parser.add_argument('--local-workers', type=int, default=0, help="also start this many workers on this machine")
+    coordinator_parser.add_argument('--output', default='-', help="CSV output file, or - for stdout (default: -)")
+
+    worker_parser = sub.add_parser('worker', help="pull units from a coordinator until the sweep is done")
+    worker_parser.add_argument('--coordinator', required=True, help="coordinator URL, e.g. http://10.0.0.5:8765")
+
+    args = parser.parse_args(argv)
+    if args.role == 'worker':
+        units = run_worker(args.coordinator)
+        print(f"Sweep finished; this worker ran {units} units", file=sys.stderr)
+        return
+
+    try:
+        scenario = load_scenario(args.scenario) if args.scenario and os.path.isfile(args.scenario) else get_scenario(args.scenario)
+        coordinator = SweepCoordinator(
+            args.dimensions, design=args.design, num_points=args.num_points, paths_per_cell=args.paths_per_cell,
+            paths_per_unit=args.paths_per_unit, fixed=scenario.batch_params(args.fixed),
+            success_threshold_savings=args.success_threshold_savings, seed=args.seed, lease_timeout=args.lease_timeout,
+            max_attempts=args.max_attempts, events=scenario.events,
+        )
+    except (KeyError, ValueError) as e:
+        coordinator_parser.error(str(e.args[0]) if e.args else str(e))
+    try:
+        columns = run_distributed_sweep(coordinator, args.host, args.port, args.local_workers)
+    except RuntimeError as e:
+        sys.exit(str(e))
+    write_csv(columns, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""Global sensitivity of outcomes to the chaos event parameters.
+
+Two methods, both run on the batch engine through sweep.evaluate_points:
+
+- 'morris': elementary effects along `num_trajectories` one-at-a-time
+  trajectories; reports mu, mu* (mean absolute effect) and sigma per
+  parameter. Cheap screening: trajectories x (k + 1) model evaluations.
+- 'sobol': first-order (S1) and total (ST) Sobol indices with Saltelli
+  sampling and the Saltelli (2010) / Jansen estimators, with bootstrap
+  confidence half-widths. num_samples x (k + 2) model evaluations.
+
+A model evaluation is one parameter point, scored by the mean final savings
+and the probability of ending in debt over `paths_per_point` simulated lives.
+Every point reuses the same random streams (common random numbers), so the
+estimated effects reflect the parameters rather than Monte Carlo noise.
+By default each parameter ranges over its chaos_events value scaled by
+1 +/- `spread`, with probabilities and fractions clipped to [0, 1]. Multiplier
+ranges (salary boosts, venture return multiples) vary their gain over 1 and
+never drop below 1, and the share of salary kept after a job loss varies its
+cut below 1 and never rises above 1, so no setting flips an event's meaning.
+Explicit `ranges` replace the default range of any parameter.
+
+    python global_sensitivity.py --method sobol --num-samples 1024 --output sobol.csv
+"""
+import argparse
+import json
+
+import numpy as np
+
+from batch_engine import flatten_events
+from serialization import write_csv
+from simulation_core import chaos_events
+from sweep import evaluate_points
+
+METHODS = ('morris', 'sobol')
+OUTPUTS = {
+    'final_savings': 'average_final_savings',
+    'debt_probability': 'debt_probability',
+}
+
+
+def _default_range(name, value, spread):
+    key = next(part for part in reversed(name.split('.')) if not part.isdigit()) # List items go by their list
+    if key.endswith('multiplier_range'):
+        # A boost or return multiple: vary the gain over 1, so it never becomes a cut
+        low, high = 1 + (value - 1) * (1 - spread), 1 + (value - 1) * (1 + spread)
+        return max(min(low, high), 1.0), max(low, high, 1.0)
+    if key == 'salary_drop_range':
+        # Share of the old salary kept: vary the cut below 1, so it never becomes a raise
+        low, high = 1 - (1 - value) * (1 + spread), 1 - (1 - value) * (1 - spread)
+        return max(min(low, high), 0.0), min(max(low, high), 1.0)
+    low, high = sorted((value * (1 - spread), value * (1 + spread)))
+    if 'prob' in key or 'percentage' in key or key.endswith('loss_multiplier'):
+        low, high = max(low, 0.0), min(high, 1.0) # Probabilities and fractions stay in [0, 1]
+    return low, high
+
+
+def event_parameter_ranges(events=None, spread=0.5, parameters=None, ranges=None):
+    """{name: (low, high)} for the chaos event parameters to analyse.
+
+    `ranges` gives explicit {name: (low, high)} bounds that replace the
+    default ones (and adds those parameters if `parameters` doesn't list
+    them). Age windows are left out by default: they are matched exactly
+    against integer ages, so they can't vary continuously.
+    """
+    flat = flatten_events(chaos_events if events is None else events)
+    explicit = dict(ranges or {})
+    if parameters is None:
+        parameters = [name for name in flat if 'age_window' not in name]
+    parameters = list(parameters) + [name for name in explicit if name not in parameters]
+    result = {}
+    for name in parameters:
+        if name not in flat:
+            raise KeyError(f"Unknown chaos event parameter '{name}'")
+        if name in explicit:
+            bounds = explicit[name]
+            if not isinstance(bounds, (list, tuple)) or len(bounds) != 2:
+                raise ValueError(f"Range for '{name}' must be [low, high], got {bounds!r}")
+            low, high = float(bounds[0]), float(bounds[1])
+            if low > high:
+                raise ValueError(f"Range for '{name}' must run from low to high, got [{low}, {high}]")
+        else:
+            low, high = _default_range(name, float(flat[name]), spread)
+        result[name] = (low, high)
+    return result
+
+
+def _scale(unit, ranges):
+    names = list(ranges)
+    lows = np.array([ranges[name][0] for name in names])
+    highs = np.array([ranges[name][1] for name in names])
+    points = lows + unit * (highs - lows)
+    return {name: points[:, index] for index, name in enumerate(names)}
+
+
+def _evaluate(unit, ranges, evaluation):
+    stats = evaluate_points(_scale(unit, ranges), **evaluation)
+    return {output: stats[stat] for output, stat in OUTPUTS.items()}
+
+
+# --- Morris elementary effects ---
+
+def morris(ranges, num_trajectories=50, num_levels=4, seed=None, **evaluation):
+    """Return {parameter: {'<output>_mu': ..., '<output>_mu_star': ..., '<output>_sigma': ...}}."""
+    rng = np.random.default_rng(seed)
+    k = len(ranges)
+    delta = num_levels / (2 * (num_levels - 1))
+    grid = np.arange(num_levels) / (num_levels - 1)
+
+    trajectories = np.empty((num_trajectories, k + 1, k))
+    orders = np.empty((num_trajectories, k), dtype=np.int64)
+    for t in range(num_trajectories):
+        point = rng.choice(grid, size=k)
+        order = rng.permutation(k)
+        trajectories[t, 0] = point
+        for step, factor in enumerate(order, start=1):
+            point = point.copy()
+            point[factor] += delta if point[factor] + delta <= 1 else -delta
+            trajectories[t, step] = point
+        orders[t] = order
+
+    outputs = _evaluate(trajectories.reshape(-1, k), ranges, dict(evaluation, seed=seed))
+
+    names = list(ranges)
+    result = {name: {} for name in names}
+    for output, values in outputs.items():
+        values = values.reshape(num_trajectories, k + 1)
+        effects = np.empty((num_trajectories, k))
+        for t in range(num_trajectories):
+            steps = np.diff(trajectories[t], axis=0)[np.arange(k), orders[t]]
+            effects[t, orders[t]] = np.diff(values[t]) / steps
+        for index, name in enumerate(names):
+            result[name][f'{output}_mu'] = float(effects[:, index].mean())
+            result[name][f'{output}_mu_star'] = float(np.abs(effects[:, index]).mean())
+            result[name][f'{output}_sigma'] = float(effects[:, index].std(ddof=1)) if num_trajectories > 1 else 0.0
+    return result
+
+
+# --- Sobol indices with Saltelli sampling ---
+
+def _sobol_indices(f_a, f_b, f_ab):
+    variance = np.var(np.concatenate([f_a, f_b]))
+    if variance == 0:
+        zeros = np.zeros(f_ab.shape[1])
+        return zeros, zeros
+    first = np.mean(f_b[:, None] * (f_ab - f_a[:, None]), axis=0) / variance
+    total = 0.5 * np.mean((f_a[:, None] - f_ab) ** 2, axis=0) / variance
+    return first, total
+
+
+def sobol(ranges, num_samples=1024, num_resamples=100, confidence=0.95, seed=None, **evaluation):
+    """Return {parameter: {'<output>_S1': ..., '<output>_S1_conf': ..., '<output>_ST': ..., '<output>_ST_conf': ...}}."""
+    from scipy.stats import norm, qmc # Only the Sobol method needs SciPy
+
+    k = len(ranges)
+    base = qmc.Sobol(d=2 * k, scramble=True, seed=seed).random(num_samples)
+    a, b = base[:, :k], base[:, k:]
+    ab = np.repeat(a[None], k, axis=0) # ab[i] is A with column i taken from B
+    for i in range(k):
+        ab[i, :, i] = b[:, i]
+
+    outputs = _evaluate(np.concatenate([a, b, ab.reshape(-1, k)]), ranges, dict(evaluation, seed=seed))
+
+    rng = np.random.default_rng(seed)
+    resamples = rng.integers(0, num_samples, (num_resamples, num_samples))
+    z = norm.ppf(0.5 + confidence / 2)
+    names = list(ranges)
+    result = {name: {} for name in names}
+    for output, values in outputs.items():
+        f_a, f_b = values[:num_samples], values[num_samples:2 * num_samples]
+        f_ab = values[2 * num_samples:].reshape(k, num_samples).T
+        first, total = _sobol_indices(f_a, f_b, f_ab)
+        boot = [_sobol_indices(f_a[r], f_b[r], f_ab[r]) for r in resamples]
+        first_conf = z * np.std([s1 for s1, _ in boot], axis=0)
+        total_conf = z * np.std([st for _, st in boot], axis=0)
+        for index, name in enumerate(names):
+            result[name][f'{output}_S1'] = float(first[index])
+            result[name][f'{output}_S1_conf'] = float(first_conf[index])
+            result[name][f'{output}_ST'] = float(total[index])
+            result[name][f'{output}_ST_conf'] = float(total_conf[index])
+    return result
+
+
+def global_sensitivity(method='sobol', parameters=None, spread=0.5, num_samples=1024, num_trajectories=50,
+                       paths_per_point=50, fixed=None, seed=None, workers=None, events=None, ranges=None):
+    """Run a global sensitivity analysis and return columns with one row per parameter.
+
+    `events` replaces the default chaos_events tables; default ranges are then
+    built around its values. `ranges` sets explicit {name: (low, high)} bounds.
+    """
+    ranges = event_parameter_ranges(events, spread=spread, parameters=parameters, ranges=ranges)
+    evaluation = {'paths_per_point': paths_per_point, 'fixed': fixed, 'workers': workers, 'common_random_numbers': True,
+                  'events': events}
+    if method == 'morris':
+        indices = morris(ranges, num_trajectories=num_trajectories, seed=seed, **evaluation)
+    elif method == 'sobol':
+        indices = sobol(ranges, num_samples=num_samples, seed=seed, **evaluation)
+    else:
+        raise ValueError(f"Unknown method '{method}', expected one of {', '.join(METHODS)}")
+
+    names = list(ranges)
+    columns = {
+        'parameter': names,
+        'low': np.array([ranges[name][0] for name in names]),
+        'high': np.array([ranges[name][1] for name in names]),
+    }
+    for stat in indices[names[0]]:
+        columns[stat] = np.array([indices[name][stat] for name in names])
+    return columns
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Morris / Sobol sensitivity of outcomes to chaos event parameters.")
+    parser.add_argument('--method', choices=METHODS, default='sobol')
+    parser.add_argument('--parameters', nargs='+', help="chaos event parameters to vary (default: all)")
+    parser.add_argument('--spread', type=float, default=0.5, help="relative range around each default value (default: 0.5)")
+    parser.add_argument('--ranges', type=json.loads, default=None,
+                        help="explicit ranges as JSON, e.g. '{\"job_loss.prob\": [0.02, 0.2]}'")
+    parser.add_argument('--num-samples', type=int, default=1024, help="Saltelli base samples for sobol (default: 1024)")
+    parser.add_argument('--num-trajectories', type=int, default=50, help="trajectories for morris (default: 50)")
+    parser.add_argument('--paths-per-point', type=int, default=50, help="simulated lives per model evaluation (default: 50)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--output', default='-', help="CSV output file, or - for stdout (default: -)")
+    args = parser.parse_args(argv)
+
+    columns = global_sensitivity(
+        args.method, parameters=args.parameters, spread=args.spread, num_samples=args.num_samples,
+        num_trajectories=args.num_trajectories, paths_per_point=args.paths_per_point,
+        seed=args.seed, workers=args.workers, ranges=args.ranges,
+    )
+    write_csv(columns, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+"""Goal seek: the smallest value of one parameter that reaches a target success probability.
+
+Answers questions like "what starting salary do I need for a 90% chance of no
+debt at 60?" by stochastic bisection on the batch engine:
+
+- success probability is assumed non-decreasing in the parameter over
+  [low, high] (true for income and capital);
+- every evaluation replays the same random streams (common random numbers),
+  so the comparison between two candidate values isn't swamped by noise;
+- each evaluation adds paths in blocks only until a Wilson confidence interval
+  for the success probability is clear of the target, so values far from the
+  answer cost a block or two and only the last few bisection steps need the
+  full path budget.
+"""
+from statistics import NormalDist
+
+import numpy as np
+
+from batch_engine import INTEGER_PARAMS, default_params, simulate_batch
+
+
+def wilson_interval(successes, trials, confidence=0.95):
+    """Wilson score interval for a binomial proportion."""
+    if trials == 0:
+        return 0.0, 1.0
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    p = successes / trials
+    denominator = 1 + z * z / trials
+    centre = (p + z * z / (2 * trials)) / denominator
+    half_width = z * np.sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials)) / denominator
+    return max(0.0, float(centre - half_width)), min(1.0, float(centre + half_width))
+
+
+class _Evaluator:
+    """Success-probability estimates on a fixed set of random streams (common random numbers)."""
+
+    def __init__(self, parameter, fixed, success_threshold_savings, target, confidence, block_paths, max_paths, seed, events=None):
+        self.parameter = parameter
+        self.events = events
+        self.fixed = dict(fixed or {})
+        self.success_threshold_savings = success_threshold_savings
+        self.target = target
+        self.confidence = confidence
+        self.block_paths = block_paths
+        self.max_blocks = max(1, -(-max_paths // block_paths))
+        self.block_seeds = np.random.SeedSequence(seed).spawn(self.max_blocks)
+        self.paths_simulated = 0
+
+    def _successes(self, value, block):
+        params = dict(self.fixed)
+        params[self.parameter] = value
+        result = simulate_batch(self.block_paths, params, rng=np.random.default_rng(self.block_seeds[block]), events=self.events)
+        success = result['final_debt'] <= 0
+        if self.success_threshold_savings is not None:
+            success &= result['final_savings'] >= self.success_threshold_savings
+        self.paths_simulated += self.block_paths
+        return int(success.sum())
+
+    def evaluate(self, value):
+        """Return (meets_target, estimate, ci_low, ci_high), sampling only as much as the decision needs."""
+        successes = trials = 0
+        for block in range(self.max_blocks):
+            successes += self._successes(value, block)
+            trials += self.block_paths
+            low, high = wilson_interval(successes, trials, self.confidence)
+            if low >= self.target or high < self.target:
+                break
+        estimate = successes / trials
+        return estimate >= self.target, estimate, low, high
+
+
+def goal_seek(parameter, low, high, target_probability=0.9, fixed=None, success_threshold_savings=None,
+              tolerance=None, confidence=0.95, block_paths=2000, max_paths_per_eval=20000, seed=None, events=None):
+    """Find the minimum `parameter` value in [low, high] whose success probability reaches the target.
+
+    Success means ending with no debt and, if `success_threshold_savings` is
+    given, at least that much saved. Returns a dict with the solution 'value'
+    (None if even `high` misses the target), its estimated 'success_probability'
+    and confidence bounds, and the total 'paths_simulated'. `events` replaces
+    the default chaos_events tables (e.g. a scenario profile's).
+    """
+    if parameter not in default_params():
+        raise KeyError(f"Unknown simulation parameter '{parameter}'")
+    if not 0 < target_probability < 1:
+        raise ValueError("target_probability must be between 0 and 1")
+    low, high = float(low), float(high)
+    if high <= low:
+        raise ValueError("high must be greater than low")
+    if block_paths < 1 or max_paths_per_eval < 1:
+        raise ValueError("block_paths and max_paths_per_eval must be at least 1")
+    if not 0 < confidence < 1:
+        raise ValueError("confidence must be between 0 and 1")
+    is_integer = parameter in INTEGER_PARAMS
+    if tolerance is None:
+        tolerance = 1 if is_integer else (high - low) / 200
+
+    evaluator = _Evaluator(parameter, fixed, success_threshold_savings, target_probability,
+                           confidence, block_paths, max_paths_per_eval, seed, events)
+    cast = (lambda v: int(round(v))) if is_integer else float
+
+    def solution(value, evaluation, iterations):
+        meets, estimate, ci_low, ci_high = evaluation
+        return {
+            'parameter': parameter,
+            'value': value,
+            'target_probability': target_probability,
+            'success_probability': estimate,
+            'ci_low': ci_low,
+            'ci_high': ci_high,
+            'feasible': value is not None,
+            'iterations': iterations,
+            'paths_simulated': evaluator.paths_simulated,
+        }
+
+    evaluation_high = evaluator.evaluate(cast(high))
+    if not evaluation_high[0]:
+        return solution(None, evaluation_high, 1)
+    evaluation_low = evaluator.evaluate(cast(low))
+    if evaluation_low[0]:
+        return solution(cast(low), evaluation_low, 2)
+
+    iterations = 2
+    while high - low > tolerance:
+        middle = cast((low + high) / 2)
+        if middle in (cast(low), cast(high)):
+            break
+        evaluation = evaluator.evaluate(middle)
+        iterations += 1
+        if evaluation[0]:
+            high, evaluation_high = middle, evaluation
+        else:
+            low = middle
+    return solution(cast(high), evaluation_high, iterations)
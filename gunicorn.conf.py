@@ -0,0 +1,36 @@
+# Gunicorn settings for the production API server.
+#
+#   gunicorn -c gunicorn.conf.py wsgi:app
+#
+# The app is preloaded in the master (imports, probability tables) and workers
+# are forked from it, so that state is shared copy-on-write instead of being
+# rebuilt in every worker. Simulation sweeps are CPU-bound and hold the GIL, so
+# parallelism comes from processes; threads only help overlap request I/O.
+import gc
+import multiprocessing
+import os
+
+bind = os.environ.get('SIM_BIND', '0.0.0.0:' + os.environ.get('PORT', '8000'))
+workers = int(os.environ.get('SIM_WORKERS', os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count())))
+threads = int(os.environ.get('SIM_THREADS', 1))
+worker_class = 'gthread' if threads > 1 else 'sync'
+
+preload_app = True
+
+# Long sensitivity grids can take a while; don't let the arbiter kill them.
+timeout = int(os.environ.get('SIM_TIMEOUT', 300))
+graceful_timeout = 30
+
+# Recycle workers periodically to bound any slow memory growth.
+max_requests = int(os.environ.get('SIM_MAX_REQUESTS', 1000))
+max_requests_jitter = max_requests // 10
+
+accesslog = '-'
+
+
+def pre_fork(server, worker):
+    # Move everything allocated so far (modules, tables, the warmed NumPy/SciPy
+    # engines) into the permanent generation: the cyclic GC then never touches
+    # those objects in the children, so their pages stay shared instead of
+    # being copied on write.
+    gc.freeze()
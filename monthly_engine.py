@@ -0,0 +1,188 @@
+"""Monthly-resolution variant of the vectorized engine.
+
+simulate_monthly() runs the same model as batch_engine.simulate_batch, with
+the same parameters, but steps every path one month at a time:
+
+- salary is paid and expenditure spent in monthly instalments, and returns
+  compound monthly at the equivalent monthly rates;
+- event probabilities, which are annual in chaos_events, become monthly
+  hazards 1 - (1 - p)^(1/12), so medical emergencies, crashes, job losses,
+  family expenses, black swans, inheritances, ventures and divorces can land
+  in any month;
+- a job loss lasts its drawn number of months (3-18 by default) instead of
+  being rounded up to whole years of zero income, and salary recovers month
+  by month afterwards;
+- a crash pays the crash-year return over the following twelve months;
+- career advancement, salary growth and expenditure growth happen once a
+  year, at the year end; children's costs fall in the first month of the year.
+
+The events themselves are batch_engine.LifeState's, the same code the
+annual engine runs, stepped with twelve periods a year. On top of
+simulate_batch's outputs it reports what monthly cash flow makes visible:
+'debt_months', 'peak_debt' (the largest shortfall at any month end, i.e. the
+emergency fund that would have been needed) and
+'longest_income_gap_months'. Retirement spending follows the 'expenditure'
+strategy only.
+"""
+import numpy as np
+
+from batch_engine import (
+    ATTRIBUTION_CAUSES,
+    MONTHS_PER_YEAR,
+    WITHDRAWAL_STRATEGIES,
+    LifeState,
+    path_params,
+    period_prob,
+    period_rate,
+)
+
+MONTHS = MONTHS_PER_YEAR
+
+
+def simulate_monthly(n_paths, params=None, rng=None, record=False, events=None, attribution=False):
+    """Simulate `n_paths` lives month by month.
+
+    Returns the same per-path arrays as simulate_batch ('final_savings',
+    'final_debt', 'debt_years', 'years', 'ruin_age', 'reached_retirement',
+    'in_debt_at_retirement')
+    plus 'debt_months', 'peak_debt' and 'longest_income_gap_months'. With
+    record=True it also returns (n_paths, 12 * max_years + 1) matrices
+    'total_savings', 'total_debt', 'income' and 'expenditure' (monthly
+    amounts), NaN past each path's horizon. With attribution=True it also
+    returns 'attribution', as simulate_batch does.
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    ev = path_params(n_paths, params, events)
+    if (ev['withdrawal_strategy'] != WITHDRAWAL_STRATEGIES['expenditure']).any():
+        raise ValueError("Monthly simulation supports only the 'expenditure' withdrawal strategy")
+
+    current_age = ev['current_age']
+    years = ev['future_age'] - current_age
+    max_years = int(years.max()) if n_paths else 0
+
+    life = LifeState(ev, n_paths, rng, periods_per_year=MONTHS)
+    after_tax = 1 - ev['tax_rate']
+    equity_base_rate = period_rate(ev['base_equity_return_rate'], MONTHS)
+    fd_rate = period_rate(ev['base_fd_return_rate'], MONTHS)
+
+    crash_hazard = period_prob(ev['market_crash.prob'] * life.bad_luck, MONTHS)
+    job_loss_hazard = period_prob(ev['job_loss.prob'] * life.bad_luck, MONTHS)
+    family_hazard = period_prob(ev['family_expense.prob'], MONTHS)
+    black_swan_hazard = period_prob(ev['black_swan.prob'] / np.maximum(years, 1), MONTHS)
+    inheritance_hazard = period_prob(ev['inheritance.prob_in_window_annual'], MONTHS)
+    venture_hazard = period_prob(ev['business_venture.prob_in_window_annual'], MONTHS)
+    divorce_hazard = period_prob(ev['divorce.prob_if_married_annual'], MONTHS)
+
+    debt_years = np.zeros(n_paths, dtype=np.int64)
+    debt_months = np.zeros(n_paths, dtype=np.int64)
+    peak_debt = np.zeros(n_paths)
+    income_gap = np.zeros(n_paths, dtype=np.int64)
+    longest_income_gap = np.zeros(n_paths, dtype=np.int64)
+
+    final_savings = life.savings.copy()
+    final_debt = life.debt.copy()
+    impact = {cause: np.zeros(n_paths) for cause in ATTRIBUTION_CAUSES} if attribution else None
+
+    if record:
+        shape = (n_paths, MONTHS * max_years + 1)
+        history = {name: np.full(shape, np.nan) for name in ('total_savings', 'total_debt', 'income', 'expenditure')}
+        history['total_savings'][:, 0] = life.savings
+        history['total_debt'][:, 0] = life.debt
+        history['income'][:, 0] = life.income / MONTHS
+        history['expenditure'][:, 0] = life.expenditure / MONTHS
+
+    for year in range(1, max_years + 1):
+        active = year <= years
+        age = current_age + year
+        working = (age <= ev['retirement_age']) & active
+        retired = active & ~working
+        life.note_retirement(retired)
+        medical_hazard = period_prob(life.medical_prob(age), MONTHS)
+
+        # Children's costs, once at the start of the year
+        birth_cost, child_ages = life.child_births(year)
+        education_cost, marriage_cost = life.children_milestones(child_ages, working)
+        if attribution:
+            impact['children'] -= birth_cost + education_cost + marriage_cost
+
+        month_expenditure = life.expenditure / MONTHS
+        life.income = np.where(working, life.income, 0.0)
+
+        for month in range(MONTHS):
+            step = MONTHS * (year - 1) + month + 1
+            month_income = life.income / MONTHS
+
+            shock = life.shocks()
+            medical_cost = life.medical_emergency(shock('medical_emergency'), medical_hazard, active)
+            crash, equity_rate = life.market_crash(shock('market_crash'), crash_hazard, active, equity_base_rate)
+
+            jobless, recovering_job = life.job_loss(shock('job_loss'), job_loss_hazard, working, loss_period_counts=True)
+            lost_income = np.where(jobless, month_income, 0.0) + np.where(recovering_job, life.income_before_job_loss / MONTHS - month_income, 0.0)
+            month_income = np.where(jobless, 0.0, month_income)
+
+            family_cost = life.family_expense(family_hazard, working)
+            swan_loss = life.black_swan(shock('black_swan'), black_swan_hazard, working)
+            inheritance_amount = life.inheritance(age, inheritance_hazard, working)
+            venture_result = life.business_venture(age, venture_hazard, working)
+            divorce, divorce_loss, income_reduction = life.divorce(year, divorce_hazard, working)
+            month_income = np.where(divorce & ~jobless, life.income / MONTHS, month_income)
+
+            # Cash flow, returns and debt
+            savings_this_month = month_income * after_tax - month_expenditure
+            investable = life.savings + np.maximum(savings_this_month, 0)
+            returns = np.where(investable > 0, investable * (ev['equity_allocation'] * equity_rate + ev['fd_allocation'] * fd_rate), 0.0)
+            life.savings = life.savings + (savings_this_month + returns) * active
+
+            if attribution:
+                crash_loss = np.where(investable > 0, investable * ev['equity_allocation'] * (equity_base_rate - equity_rate), 0.0)
+                impact['job_loss'] -= lost_income * after_tax * working
+                impact['medical_emergency'] -= medical_cost
+                impact['market_crash'] -= crash_loss * active
+                impact['family_expense'] -= family_cost
+                impact['black_swan'] -= swan_loss
+                impact['divorce'] -= divorce_loss + income_reduction * after_tax
+                impact['business_venture'] += venture_result
+                impact['inheritance'] += inheritance_amount
+
+            life.settle_debt()
+            in_debt = (life.debt > 0) & active
+            debt_months += in_debt
+            peak_debt = np.where(active, np.maximum(peak_debt, life.debt), peak_debt)
+            income_gap = np.where(working & (month_income <= 0), income_gap + 1, 0)
+            longest_income_gap = np.maximum(longest_income_gap, income_gap)
+            life.note_ruin(retired, age)
+
+            if record:
+                history['total_savings'][active, step] = life.savings[active]
+                history['total_debt'][active, step] = life.debt[active]
+                history['income'][active, step] = month_income[active]
+                history['expenditure'][active, step] = month_expenditure[active]
+
+        # Year end: career advancement, salary growth and expenditure growth
+        life.career_advancement(age, working)
+        life.salary_growth(age, working)
+        life.income = np.where(retired, 0.0, life.income)
+        life.expenditure_growth(child_ages, active)
+
+        debt_years += (life.debt > 0) & active
+        ends_now = years == year
+        final_savings = np.where(ends_now, life.savings, final_savings)
+        final_debt = np.where(ends_now, life.debt, final_debt)
+
+    result = {
+        'final_savings': final_savings,
+        'final_debt': final_debt,
+        'debt_years': debt_years,
+        'years': years,
+        'ruin_age': life.ruin_age,
+        'reached_retirement': life.reached_retirement,
+        'in_debt_at_retirement': life.in_debt_at_retirement,
+        'debt_months': debt_months,
+        'peak_debt': peak_debt,
+        'longest_income_gap_months': longest_income_gap,
+    }
+    if attribution:
+        result['attribution'] = impact
+    if record:
+        result.update(history)
+    return result
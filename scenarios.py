@@ -0,0 +1,268 @@
+"""Scenario profiles: named variants of chaos_events and financial_params loaded from files.
+
+A profile is a JSON or YAML file (YAML needs PyYAML) in the scenario directory
+(SIM_SCENARIO_DIR, default ./scenarios), named after the profile:
+
+    # scenarios/recession.yaml
+    description: Deep recession, correlated layoffs
+    chaos_events:
+      job_loss: {prob: 0.15, max_duration_months: 24}
+      market_crash: {prob: 0.2, return_range: [-0.5, -0.25]}
+    financial_params:
+      base_equity_return_rate: 0.07
+
+Profiles only list what differs: everything else keeps the values in
+simulation_core. A profile is validated against the shape of those defaults
+(known keys only, numbers where numbers are expected, probabilities in
+[0, 1], ranges and min_/max_ pairs ordered low to high, no negative amounts
+outside NEGATIVE_SETTINGS) and compiled once into a Scenario holding
+the full merged tables and a content hash of them. The hash, not the name,
+is what caches and result keys should use: editing a profile changes its
+hash, so exactly the results computed from the old version go stale.
+
+The registry re-reads a profile whenever its file changes on disk (checked at
+most every `check_interval` seconds), so profiles can be added or edited on a
+running server. A file that fails validation is reported and the previous
+version of that profile stays in use. The built-in 'default' profile is the
+module defaults themselves.
+"""
+import copy
+import hashlib
+import json
+import os
+import threading
+import time
+
+from simulation_core import LUCK_FACTORS, chaos_events, discard_probability_tables, financial_params, probability_table
+
+DEFAULT_SCENARIO = 'default'
+SCENARIO_DIR = os.environ.get('SIM_SCENARIO_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scenarios'))
+EXTENSIONS = ('.json', '.yaml', '.yml')
+PROFILE_KEYS = ('description', 'chaos_events', 'financial_params')
+# The only chaos_events settings that may be negative (a crash year's return); list items are named by their list
+NEGATIVE_SETTINGS = frozenset({'chaos_events.market_crash.return_range'})
+
+
+class Scenario:
+    """A compiled profile: the merged event and financial tables plus their content hash."""
+
+    def __init__(self, name, events, financial, description='', source=None):
+        self.name = name
+        self.events = events
+        self.financial_params = financial
+        self.description = description
+        self.source = source
+        canonical = json.dumps({'chaos_events': events, 'financial_params': financial}, sort_keys=True)
+        self.content_hash = hashlib.sha256(canonical.encode()).hexdigest()[:16]
+
+    def batch_params(self, overrides=None):
+        """batch_engine parameters for this scenario: its financial assumptions, then `overrides` on top.
+
+        Pass the result as `params` together with events=scenario.events.
+        """
+        params = dict(self.financial_params)
+        params.update(overrides or {})
+        return params
+
+    def describe(self):
+        return {'name': self.name, 'description': self.description, 'content_hash': self.content_hash}
+
+
+# --- Validation against the shape of the defaults ---
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _is_fraction(field):
+    return 'prob' in field or 'percentage' in field or field.endswith('loss_multiplier') or field in ('tax_rate', 'equity_allocation', 'fd_allocation')
+
+
+def _is_whole(field):
+    return field.endswith(('_months', '_years_range')) or 'window' in field or field == 'retirement_age'
+
+
+def _validate(path, value, default):
+    """Check `value` against the default at the same place; return it with tuples restored."""
+    parts = path.split('.')
+    field = next(part for part in reversed(parts) if not part.isdigit()) # List items are checked as their list
+    if isinstance(default, dict):
+        if not isinstance(value, dict):
+            raise ValueError(f"{path} must be a mapping")
+        unknown = sorted(set(value) - set(default))
+        if unknown:
+            raise ValueError(f"Unknown setting '{path}.{unknown[0]}'")
+        return {name: _validate(f"{path}.{name}", item, default[name]) for name, item in value.items()}
+    if isinstance(default, (list, tuple)):
+        if not isinstance(value, (list, tuple)) or len(value) != len(default):
+            raise ValueError(f"{path} must be a list of {len(default)} values")
+        items = [_validate(f"{path}.{index}", item, default[index]) for index, item in enumerate(value)]
+        if ('range' in field or 'window' in field) and all(_is_number(item) for item in items) and items[0] > items[-1]:
+            raise ValueError(f"{path} must run from low to high, got {items}")
+        return tuple(items) if isinstance(default, tuple) else items
+    if not _is_number(value):
+        raise ValueError(f"{path} must be a number, got {value!r}")
+    if _is_whole(field) and value != int(value):
+        raise ValueError(f"{path} must be a whole number, got {value!r}")
+    if _is_fraction(field) and not 0 <= value <= 1:
+        raise ValueError(f"{path} must be between 0 and 1, got {value!r}")
+    setting = '.'.join(part for part in parts if not part.isdigit())
+    if parts[0] == 'chaos_events' and setting not in NEGATIVE_SETTINGS and value < 0:
+        raise ValueError(f"{path} must not be negative, got {value!r}")
+    return int(value) if _is_whole(field) else value
+
+
+def _check_pairs(path, table):
+    """Check that every min_<x> in the merged `table` is at most its max_<x>."""
+    for name, value in table.items():
+        if isinstance(value, dict):
+            _check_pairs(f"{path}.{name}", value)
+        elif name.startswith('min_') and f"max_{name[4:]}" in table and value > table[f"max_{name[4:]}"]:
+            raise ValueError(f"{path}.{name} ({value!r}) must not exceed {path}.max_{name[4:]} ({table[f'max_{name[4:]}']!r})")
+
+
+def _merge(base, overrides):
+    merged = copy.deepcopy(base)
+    for name, value in overrides.items():
+        if isinstance(value, dict):
+            merged[name] = _merge(merged[name], value)
+        else:
+            merged[name] = value
+    return merged
+
+
+def compile_scenario(name, document, source=None):
+    """Validate a parsed profile document and merge it onto the defaults."""
+    if not isinstance(document, dict):
+        raise ValueError(f"Scenario '{name}' must be a mapping")
+    unknown = sorted(set(document) - set(PROFILE_KEYS))
+    if unknown:
+        raise ValueError(f"Scenario '{name}': unknown section '{unknown[0]}', expected {', '.join(PROFILE_KEYS)}")
+    try:
+        events = _validate('chaos_events', document.get('chaos_events') or {}, chaos_events)
+        financial = _validate('financial_params', document.get('financial_params') or {}, financial_params)
+        # Pairs are checked after merging: a profile may override just one side of a pair
+        merged_events = _merge(chaos_events, events)
+        _check_pairs('chaos_events', merged_events)
+    except ValueError as e:
+        raise ValueError(f"Scenario '{name}': {e}") from None
+    return Scenario(name, merged_events, _merge(financial_params, financial),
+                    description=str(document.get('description', '')), source=source)
+
+
+def load_scenario(path):
+    """Read and compile one profile file; the scenario is named after the file."""
+    name, extension = os.path.splitext(os.path.basename(path))
+    with open(path, encoding='utf-8') as handle:
+        text = handle.read()
+    if extension == '.json':
+        document = json.loads(text)
+    else:
+        import yaml # Only YAML profiles need PyYAML
+        document = yaml.safe_load(text)
+    return compile_scenario(name, document, source=path)
+
+
+# --- Hot-reloading registry ---
+
+class ScenarioRegistry:
+    """Profiles in `directory`, re-read whenever their files change."""
+
+    def __init__(self, directory=SCENARIO_DIR, check_interval=1.0):
+        self.directory = directory
+        self.check_interval = check_interval
+        self.default = Scenario(DEFAULT_SCENARIO, copy.deepcopy(chaos_events), dict(financial_params), 'Built-in defaults')
+        self._scenarios = {}
+        self._stamps = {} # path -> (mtime_ns, size) of the version last read
+        self.errors = {} # scenario name -> why its file failed to load
+        self._checked = None
+        self._lock = threading.Lock() # Guards _scenarios, _stamps and errors; refresh() mutates them in place
+
+    def refresh(self):
+        """Re-read new or changed profile files and forget deleted ones."""
+        with self._lock:
+            self._checked = time.monotonic()
+            try:
+                names = sorted(os.listdir(self.directory))
+            except FileNotFoundError:
+                names = []
+            seen = set()
+            for filename in names:
+                if not filename.endswith(EXTENSIONS):
+                    continue
+                path = os.path.join(self.directory, filename)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                seen.add(path)
+                stamp = (stat.st_mtime_ns, stat.st_size)
+                if self._stamps.get(path) == stamp:
+                    continue
+                self._stamps[path] = stamp
+                name = os.path.splitext(filename)[0]
+                try:
+                    scenario = load_scenario(path)
+                except Exception as e: # Keep serving the last good version
+                    self.errors[name] = str(e)
+                    continue
+                self.errors.pop(name, None)
+                previous = self._scenarios.get(name)
+                if previous is not None and previous.content_hash != scenario.content_hash:
+                    discard_probability_tables(previous.content_hash)
+                self._scenarios[name] = scenario
+            for path in set(self._stamps) - seen:
+                del self._stamps[path]
+                name = os.path.splitext(os.path.basename(path))[0]
+                self.errors.pop(name, None)
+                scenario = self._scenarios.pop(name, None)
+                if scenario is not None:
+                    discard_probability_tables(scenario.content_hash)
+
+    def _maybe_refresh(self):
+        if self._checked is None or time.monotonic() - self._checked >= self.check_interval:
+            self.refresh()
+
+    def get(self, name=None):
+        """The current version of scenario `name` (the built-in defaults for None or 'default')."""
+        self._maybe_refresh()
+        name = name or DEFAULT_SCENARIO
+        with self._lock:
+            scenario = self._scenarios.get(name)
+            error = self.errors.get(name)
+        if scenario is not None:
+            return scenario
+        if name == DEFAULT_SCENARIO:
+            return self.default
+        if error is not None:
+            raise ValueError(f"Scenario '{name}' failed to load: {error}")
+        raise KeyError(f"Unknown scenario '{name}'")
+
+    def warm_up(self):
+        """Load every profile and build its probability tables (before forking workers)."""
+        self.refresh()
+        with self._lock:
+            scenarios = [self.default] + list(self._scenarios.values())
+        for scenario in scenarios:
+            for luck_factor in LUCK_FACTORS:
+                probability_table(luck_factor, scenario)
+
+    def describe(self):
+        """Name, description and content hash of every available scenario, plus load errors."""
+        self._maybe_refresh()
+        scenarios = {DEFAULT_SCENARIO: self.default}
+        with self._lock:
+            scenarios.update(self._scenarios)
+            errors = dict(self.errors)
+        return {
+            'scenarios': [scenario.describe() for _, scenario in sorted(scenarios.items())],
+            'errors': errors,
+        }
+
+
+registry = ScenarioRegistry()
+
+
+def get_scenario(name=None):
+    """Scenario `name` from the shared registry."""
+    return registry.get(name)
@@ -1,112 +1,263 @@
 #!/usr/bin/env python3
+"""Salary x capital sensitivity sweep.
 
-import sys
-import os
+Runs the Monte Carlo simulation for every (initial salary, initial capital)
+cell of a grid across a process pool, checkpointing each finished cell to a
+SQLite file so an interrupted sweep resumes where it stopped. Results are
+written as CSV or JSON.
+
+    python sensitivity_analysis.py --salaries 20:60:5 --capitals 0:100:10 \\
+        --runs 100 --workers 8 --checkpoint nightly.sqlite --output nightly.csv
 
-# Add the parent directory to the Python path to allow importing 'api'
-# This assumes 'sensitivity_analysis.py' is in the same directory as 'api.py'
-# or that 'api.py' is in a way that it can be imported directly.
-# For robustness, especially if structure changes, consider packaging or more explicit path management.
+--scenario runs the grid on a scenario profile (see scenarios.py) instead of
+the built-in event tables.
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import random
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
-# Attempt to import the simulation function. 
-# This assumes api.py is in the same directory or PYTHONPATH is set up.
+# Import the simulation from the dependency-free core rather than api.py, so the
+# CLI doesn't pay for Flask, CORS and the route registrations at startup.
+# This assumes simulation_core.py is in the same directory or PYTHONPATH is set up.
 try:
-    from api import run_financial_simulation, chaos_events
+    from simulation_core import run_financial_simulation
+    from scenarios import get_scenario, load_scenario
 except ImportError as e:
-    # If api.py is in the same directory, this should work.
-    # If it's in a subdirectory or elsewhere, sys.path might need adjustment.
-    # Example: current_dir = os.path.dirname(os.path.abspath(__file__))
-    # sys.path.append(current_dir) # Or parent_dir if api.py is one level up, etc.
-    print(f"Error importing 'run_financial_simulation' from 'api.py': {e}")
-    print("Please ensure 'api.py' is in the same directory as this script or in the PYTHONPATH.")
+    print(f"Error importing 'run_financial_simulation' from 'simulation_core.py': {e}")
+    print("Please ensure 'simulation_core.py' is in the same directory as this script or in the PYTHONPATH.")
     sys.exit(1)
 
-def perform_sensitivity_analysis():
-    initial_expenditure = 4  # Default initial annual expenditure in lakhs, based on financial_modeling.py
-    start_age = 26
-    target_age = 60
-    num_simulations_per_combination = 100
-    neutral_luck_factor = "neutral"
-
-    # Define ranges for initial salary and initial capital (in lakhs)
-    # These ranges can be adjusted based on desired granularity and computational time
-    initial_salaries = range(20, 61, 5)  # e.g., 20L to 60L, step 5L
-    initial_capitals = range(0, 101, 10) # e.g., 0L to 100L, step 10L
-
-    successful_combinations = []
-
-    print(f"Starting sensitivity analysis...")
-    print(f"Parameters: Start Age={start_age}, Target Age={target_age}, Expenditure={initial_expenditure}L/year, Luck Factor='{neutral_luck_factor}', Runs per combo={num_simulations_per_combination}")
-    print("-----------------------------------------------------")
-
-    total_combinations = len(list(initial_salaries)) * len(list(initial_capitals))
-    current_combination_count = 0
-
-    for salary in initial_salaries:
-        for capital in initial_capitals:
-            current_combination_count += 1
-            print(f"\nTesting combination {current_combination_count}/{total_combinations}: Initial Salary = {salary}L, Initial Capital = {capital}L")
-            
-            debt_free_in_all_runs = True
-            max_debt_encountered_for_combo = 0
-
-            for i in range(num_simulations_per_combination):
-                # Ensure chaos_events is available to run_financial_simulation
-                # It's defined globally in api.py, so direct import of the function should be fine.
-                simulation_results = run_financial_simulation(
-                    initial_income_param=salary,
-                    initial_expenditure_param=initial_expenditure,
-                    initial_capital_param=capital,
-                    current_age_param=start_age,
-                    future_age_param=target_age,
-                    luck_factor_param=neutral_luck_factor
-                )
-                
-                final_year_data = None
-                for year_data in simulation_results:
-                    if year_data['age'] == target_age:
-                        final_year_data = year_data
-                        break
-                
-                if final_year_data is None:
-                    print(f"  Run {i+1}/{num_simulations_per_combination}: Error - Target age {target_age} not found in results.")
-                    debt_free_in_all_runs = False # Mark as failure for safety
-                    break 
-
-                if final_year_data['totalDebt'] > 0:
-                    debt_free_in_all_runs = False
-                    max_debt_encountered_for_combo = max(max_debt_encountered_for_combo, final_year_data['totalDebt'])
-                    # print(f"  Run {i+1}/{num_simulations_per_combination}: Debt of {final_year_data['totalDebt']:.2f}L at age {target_age}.")
-                    break # This combination failed, no need for more runs for it
-            
-            if debt_free_in_all_runs:
-                print(f"  SUCCESS: Salary={salary}L, Capital={capital}L -> Consistently NO DEBT by age {target_age}.")
-                successful_combinations.append({'salary': salary, 'capital': capital})
-            else:
-                print(f"  FAILURE: Salary={salary}L, Capital={capital}L -> Potential debt by age {target_age}. Max debt observed: {max_debt_encountered_for_combo:.2f}L")
-
-    print("\n--- Sensitivity Analysis Complete ---")
-    
-    # Ensure unique combinations before printing and sort them
-    # Convert list of dicts to list of tuples for set operation, then sort
-    if successful_combinations:
-        # Create a set of tuples to get unique pairs, then convert back to a list of dicts or tuples for sorted printing
-        unique_combo_tuples = sorted(list(set((d['salary'], d['capital']) for d in successful_combinations)))
-        
-        print(f"Found {len(unique_combo_tuples)} unique combinations that result in no debt by age {target_age} across all {num_simulations_per_combination} '{neutral_luck_factor}' luck simulations:")
-        for salary, capital in unique_combo_tuples:
-            print(f"  - Initial Salary: {salary} Lakhs, Initial Capital: {capital} Lakhs")
-    else:
-        # This case handles when successful_combinations is empty from the start
-        print(f"Found 0 combinations that result in no debt by age {target_age} across all {num_simulations_per_combination} '{neutral_luck_factor}' luck simulations:")
-        print("  No combinations found that consistently guarantee no debt under the specified conditions and ranges.")
-        print("  Consider expanding the ranges for salary/capital or adjusting other parameters.")
+RESULT_FIELDS = [
+    'salary',
+    'capital',
+    'runs',
+    'debt_free_runs',
+    'debt_free_rate',
+    'max_debt',
+    'mean_final_savings',
+    'always_debt_free',
+]
+
+
+def parse_range(text):
+    """Parse an inclusive 'start:stop:step' range (or a single value) into a list of floats."""
+    parts = [float(p) for p in text.split(':')]
+    if len(parts) == 1:
+        return parts
+    if len(parts) != 3 or parts[2] <= 0:
+        raise argparse.ArgumentTypeError(f"expected start:stop:step with a positive step, got '{text}'")
+    start, stop, step = parts
+    count = int(round((stop - start) / step)) + 1
+    return [round(start + i * step, 10) for i in range(max(count, 0))]
+
+
+def cell_seed(base_seed, salary, capital):
+    """Deterministic per-cell seed, so results don't depend on scheduling or resumption."""
+    digest = hashlib.sha256(f"{base_seed}:{salary!r}:{capital!r}".encode()).digest()
+    return int.from_bytes(digest[:8], 'little')
+
+
+def evaluate_cell(salary, capital, config, scenario=None):
+    """Run every simulation for one grid cell and return its summary row."""
+    rng = random.Random(cell_seed(config['seed'], salary, capital)) # Never the process-wide random state
+
+    debt_free_runs = 0
+    max_debt = 0.0
+    final_savings_total = 0.0
+    runs = 0
+
+    for _ in range(config['runs']):
+        simulation_results = run_financial_simulation(
+            initial_income_param=salary,
+            initial_expenditure_param=config['expenditure'],
+            initial_capital_param=capital,
+            current_age_param=config['start_age'],
+            future_age_param=config['target_age'],
+            luck_factor_param=config['luck_factor'],
+            as_columns=True,
+            scenario=scenario,
+            rng=rng
+        )
+        runs += 1
+        final_debt = simulation_results['totalDebt'][-1]
+        final_savings_total += simulation_results['totalSavings'][-1]
+        if final_debt > 0:
+            max_debt = max(max_debt, final_debt)
+            if config['early_exit']:
+                break # This combination failed, no need for more runs for it
+        else:
+            debt_free_runs += 1
+
+    return {
+        'salary': salary,
+        'capital': capital,
+        'runs': runs,
+        'debt_free_runs': debt_free_runs,
+        'debt_free_rate': debt_free_runs / runs if runs else 0.0,
+        'max_debt': round(max_debt, 2),
+        'mean_final_savings': round(final_savings_total / runs, 2) if runs else 0.0,
+        'always_debt_free': int(runs == config['runs'] and debt_free_runs == runs),
+    }
+
+
+# --- Checkpointing ---
+
+def open_checkpoint(path, config):
+    """Open (or create) the checkpoint database and check it belongs to this sweep configuration."""
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS cells ("
+        "salary REAL, capital REAL, runs INTEGER, debt_free_runs INTEGER, debt_free_rate REAL, "
+        "max_debt REAL, mean_final_savings REAL, always_debt_free INTEGER, "
+        "PRIMARY KEY (salary, capital))"
+    )
+    config_json = json.dumps(config, sort_keys=True)
+    row = connection.execute("SELECT value FROM meta WHERE key = 'config'").fetchone()
+    if row is None:
+        connection.execute("INSERT INTO meta (key, value) VALUES ('config', ?)", (config_json,))
+        connection.commit()
+    elif row[0] != config_json:
+        connection.close()
+        raise SystemExit(
+            f"Checkpoint '{path}' was created with different settings:\n  {row[0]}\n"
+            "Use a new --checkpoint file or rerun with the original settings."
+        )
+    return connection
+
+
+def load_finished_cells(connection):
+    cursor = connection.execute(f"SELECT {', '.join(RESULT_FIELDS)} FROM cells")
+    return {(row[0], row[1]): dict(zip(RESULT_FIELDS, row)) for row in cursor}
+
+
+def save_cell(connection, result):
+    connection.execute(
+        f"INSERT OR REPLACE INTO cells ({', '.join(RESULT_FIELDS)}) VALUES ({', '.join('?' * len(RESULT_FIELDS))})",
+        [result[field] for field in RESULT_FIELDS],
+    )
+    connection.commit()
+
+
+# --- Output ---
+
+def write_results(results, output, output_format):
+    stream = open(output, 'w', newline='') if output and output != '-' else sys.stdout
+    try:
+        if output_format == 'json':
+            json.dump(results, stream, indent=2)
+            stream.write('\n')
+        else:
+            writer = csv.DictWriter(stream, fieldnames=RESULT_FIELDS)
+            writer.writeheader()
+            writer.writerows(results)
+    finally:
+        if stream is not sys.stdout:
+            stream.close()
+
+
+def perform_sensitivity_analysis(salaries, capitals, config, workers=None, checkpoint=None, progress=True, scenario=None):
+    """Evaluate every (salary, capital) cell, resuming from `checkpoint` if given.
+
+    Returns the list of per-cell summary rows in grid order.
+    """
+    connection = open_checkpoint(checkpoint, config) if checkpoint else None
+    finished = load_finished_cells(connection) if connection else {}
+
+    cells = [(float(salary), float(capital)) for salary in salaries for capital in capitals]
+    pending = [cell for cell in cells if cell not in finished]
+    total = len(cells)
+    done = total - len(pending)
+
+    if progress:
+        print(f"{total} cells, {done} already checkpointed, {len(pending)} to run "
+              f"({config['runs']} runs each, {workers or os.cpu_count()} workers)", file=sys.stderr)
+
+    started = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(evaluate_cell, salary, capital, config, scenario): (salary, capital) for salary, capital in pending}
+            for future in as_completed(futures):
+                result = future.result()
+                finished[futures[future]] = result
+                if connection:
+                    save_cell(connection, result)
+                done += 1
+                if progress:
+                    elapsed = time.perf_counter() - started
+                    print(f"[{done}/{total}] salary={result['salary']}L capital={result['capital']}L "
+                          f"debt-free {result['debt_free_runs']}/{result['runs']} ({elapsed:.1f}s)", file=sys.stderr)
+    finally:
+        if connection:
+            connection.close()
+
+    return [finished[cell] for cell in cells]
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Salary x capital sensitivity sweep with checkpointing.")
+    parser.add_argument('--salaries', type=parse_range, default=parse_range('20:60:5'),
+                        help="initial salaries in lakhs, as start:stop:step (inclusive) or a single value (default: 20:60:5)")
+    parser.add_argument('--capitals', type=parse_range, default=parse_range('0:100:10'),
+                        help="initial capitals in lakhs, as start:stop:step (inclusive) or a single value (default: 0:100:10)")
+    parser.add_argument('--runs', type=int, default=100, help="simulations per cell (default: 100)")
+    parser.add_argument('--expenditure', type=float, default=4, help="initial annual expenditure in lakhs (default: 4)")
+    parser.add_argument('--start-age', type=int, default=26)
+    parser.add_argument('--target-age', type=int, default=60)
+    parser.add_argument('--luck', choices=['unlucky', 'neutral', 'lucky'], default='neutral')
+    parser.add_argument('--scenario', default=None,
+                        help="scenario profile name from the scenario directory, or a path to a profile file (default: built-in events)")
+    parser.add_argument('--seed', type=int, default=0, help="base seed; each cell derives its own stream from it")
+    parser.add_argument('--early-exit', action='store_true',
+                        help="stop a cell at its first run that ends in debt (pass/fail only, much faster)")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument('--checkpoint', help="SQLite file to checkpoint finished cells to and resume from")
+    parser.add_argument('--output', default='-', help="output file, or - for stdout (default: -)")
+    parser.add_argument('--format', choices=['csv', 'json'], default=None,
+                        help="output format (default: from --output extension, else csv)")
+    parser.add_argument('--quiet', action='store_true', help="no progress on stderr")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    output_format = args.format or ('json' if args.output.endswith('.json') else 'csv')
+    try:
+        scenario = load_scenario(args.scenario) if args.scenario and os.path.isfile(args.scenario) else get_scenario(args.scenario)
+    except (KeyError, ValueError) as e:
+        parser.error(str(e.args[0]) if e.args else str(e))
+    config = {
+        'runs': args.runs,
+        'expenditure': args.expenditure,
+        'start_age': args.start_age,
+        'target_age': args.target_age,
+        'luck_factor': args.luck,
+        'seed': args.seed,
+        'early_exit': args.early_exit,
+        # Cells are keyed by their values, but changed event or financial tables must not reuse old cells
+        'scenario': scenario.content_hash,
+    }
+    results = perform_sensitivity_analysis(
+        args.salaries, args.capitals, config,
+        workers=args.workers, checkpoint=args.checkpoint, progress=not args.quiet, scenario=scenario,
+    )
+    write_results(results, args.output, output_format)
+
 
 if __name__ == "__main__":
-    # This is to ensure that api.py (and its chaos_events) can be found if it's in the same directory
+    # This is to ensure that simulation_core.py (and its chaos_events) can be found if it's in the same directory
     # This might not be necessary if the project is structured as a package or PYTHONPATH is set
     script_dir = os.path.dirname(os.path.abspath(__file__))
     if script_dir not in sys.path:
         sys.path.insert(0, script_dir)
-    
-    perform_sensitivity_analysis()
\ No newline at end of file
+
+    main()
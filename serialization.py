@@ -0,0 +1,120 @@
+import csv
+import sys
+
+# --- Columnar binary response format ---
+# Responses are a MessagePack map of the form
+#   {"format": "columnar", "length": n, "columns": {name: column}}
+# where a numeric column is {"dtype": "f8" | "f4" | "i4" | "i8", "data": <little-endian bytes>}
+# and a text column is a plain list of strings. Numeric columns are raw typed
+# arrays, so neither side pays a per-row key or per-float text encoding cost.
+# Integers go out as i4 unless a value falls outside the int32 range, then as
+# i8. Floats go out as f8 unless the route lists them as display columns: those
+# are only ever shown rounded to a few digits, so f4 (about 7 significant
+# digits) halves their size without changing what the user sees.
+COLUMNAR_MIMETYPE = 'application/x-msgpack'
+JSON_MIMETYPE = 'application/json'
+
+# NumPy is imported only by the encode/decode functions: plain JSON responses never need it.
+# Flask is imported only by columnar_response, so the CLIs can share write_csv without it.
+_DTYPES = {'f8': '<f8', 'f4': '<f4', 'i4': '<i4', 'i8': '<i8'}
+_INT32_MIN, _INT32_MAX = -2**31, 2**31 - 1
+
+
+def wants_columnar(request):
+    """True if the client prefers the columnar MessagePack format over JSON."""
+    # JSON is listed first so that ties (e.g. `Accept: */*`) keep the old behaviour.
+    return request.accept_mimetypes.best_match([JSON_MIMETYPE, COLUMNAR_MIMETYPE]) == COLUMNAR_MIMETYPE
+
+
+def _encode_column(values, display=False):
+    import numpy as np
+    if isinstance(values, np.ndarray):
+        array = values
+    elif values and isinstance(values[0], str):
+        return list(values)
+    else:
+        array = np.asarray(values)
+
+    if array.dtype.kind in 'iub':
+        fits_int32 = array.size == 0 or (array.min() >= _INT32_MIN and array.max() <= _INT32_MAX)
+        dtype = 'i4' if fits_int32 else 'i8'
+    elif array.dtype.kind == 'f':
+        dtype = 'f4' if display else 'f8'
+    else:
+        return [str(v) for v in array.tolist()]
+    return {'dtype': dtype, 'data': array.astype(_DTYPES[dtype], copy=False).tobytes()}
+
+
+def pack_columns(columns, display_columns=()):
+    """Encode a dict of equal-length columns (lists or arrays) as columnar MessagePack bytes.
+
+    Float columns named in `display_columns` are sent as f4 rather than f8.
+    """
+    length = len(next(iter(columns.values()))) if columns else 0
+    import msgpack # Only the binary response path needs it; keep it off the import path
+    payload = {
+        'format': 'columnar',
+        'length': length,
+        'columns': {name: _encode_column(values, name in display_columns) for name, values in columns.items()},
+    }
+    return msgpack.packb(payload, use_bin_type=True)
+
+
+def unpack_columns(data):
+    """Decode columnar MessagePack bytes back into a dict of NumPy arrays / string lists."""
+    import msgpack
+    import numpy as np
+    payload = msgpack.unpackb(data, raw=False)
+    columns = {}
+    for name, column in payload['columns'].items():
+        if isinstance(column, dict):
+            columns[name] = np.frombuffer(column['data'], dtype=_DTYPES[column['dtype']])
+        else:
+            columns[name] = column
+    return columns
+
+
+def rows_from_columns(columns, round_digits=None):
+    """Turn a dict of columns into the list-of-dicts shape the JSON API has always returned."""
+    names = list(columns)
+    lists = []
+    for name in names:
+        values = columns[name]
+        if hasattr(values, 'tolist'): # NumPy arrays
+            values = values.tolist()
+        if round_digits is not None:
+            values = [round(v, round_digits) if isinstance(v, float) else v for v in values]
+        values = [None if isinstance(v, float) and v != v else v for v in values] # NaN has no JSON form
+        lists.append(values)
+    return [dict(zip(names, row)) for row in zip(*lists)]
+
+
+def columnar_response(request, columns, round_digits=2, display_columns=()):
+    """Respond with columnar MessagePack if the client asked for it, otherwise with row JSON.
+
+    `display_columns` names float columns that are only displayed (and would be
+    rounded to `round_digits` in JSON); they are packed as f4.
+    """
+    from flask import Response, jsonify
+    if wants_columnar(request):
+        response = Response(pack_columns(columns, display_columns), mimetype=COLUMNAR_MIMETYPE)
+    else:
+        response = jsonify(rows_from_columns(columns, round_digits))
+    response.vary.add('Accept')
+    return response
+
+
+def write_csv(columns, output='-'):
+    """Write a dict of equal-length columns as CSV to the file `output`, or to stdout for '-'.
+
+    Floats are written with 6 significant digits; everything else as is.
+    """
+    stream = open(output, 'w', newline='') if output != '-' else sys.stdout
+    try:
+        writer = csv.writer(stream)
+        writer.writerow(list(columns))
+        for row in zip(*columns.values()):
+            writer.writerow([f"{value:.6g}" if isinstance(value, float) else value for value in row])
+    finally:
+        if stream is not sys.stdout:
+            stream.close()
@@ -0,0 +1,160 @@
+// Decoder for the columnar MessagePack responses served by the Python API
+// (see serialization.py). Only the subset of MessagePack the server emits is
+// supported: maps, arrays, strings, binary, integers, floats, bool and nil.
+
+export const COLUMNAR_MIMETYPE = "application/x-msgpack";
+
+// Ask for the binary format first but keep JSON as an acceptable fallback.
+export const COLUMNAR_ACCEPT = `${COLUMNAR_MIMETYPE}, application/json;q=0.9`;
+
+type MsgpackValue =
+  | null
+  | boolean
+  | number
+  | string
+  | Uint8Array
+  | MsgpackValue[]
+  | { [key: string]: MsgpackValue };
+
+type NumericColumn = { dtype: "f8" | "f4" | "i4" | "i8"; data: Uint8Array };
+
+interface ColumnarPayload {
+  format: "columnar";
+  length: number;
+  columns: Record<string, NumericColumn | string[]>;
+}
+
+class Reader {
+  private view: DataView;
+  private offset = 0;
+  private textDecoder = new TextDecoder();
+
+  constructor(private bytes: Uint8Array) {
+    this.view = new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength);
+  }
+
+  read(): MsgpackValue {
+    const byte = this.view.getUint8(this.offset++);
+
+    if (byte <= 0x7f) return byte;
+    if (byte >= 0xe0) return byte - 0x100;
+    if ((byte & 0xf0) === 0x80) return this.readMap(byte & 0x0f);
+    if ((byte & 0xf0) === 0x90) return this.readArray(byte & 0x0f);
+    if ((byte & 0xe0) === 0xa0) return this.readString(byte & 0x1f);
+
+    switch (byte) {
+      case 0xc0: return null;
+      case 0xc2: return false;
+      case 0xc3: return true;
+      case 0xc4: return this.readBytes(this.uint(1));
+      case 0xc5: return this.readBytes(this.uint(2));
+      case 0xc6: return this.readBytes(this.uint(4));
+      case 0xca: { const v = this.view.getFloat32(this.offset); this.offset += 4; return v; }
+      case 0xcb: { const v = this.view.getFloat64(this.offset); this.offset += 8; return v; }
+      case 0xcc: return this.uint(1);
+      case 0xcd: return this.uint(2);
+      case 0xce: return this.uint(4);
+      case 0xcf: { const v = Number(this.view.getBigUint64(this.offset)); this.offset += 8; return v; }
+      case 0xd0: { const v = this.view.getInt8(this.offset); this.offset += 1; return v; }
+      case 0xd1: { const v = this.view.getInt16(this.offset); this.offset += 2; return v; }
+      case 0xd2: { const v = this.view.getInt32(this.offset); this.offset += 4; return v; }
+      case 0xd3: { const v = Number(this.view.getBigInt64(this.offset)); this.offset += 8; return v; }
+      case 0xd9: return this.readString(this.uint(1));
+      case 0xda: return this.readString(this.uint(2));
+      case 0xdb: return this.readString(this.uint(4));
+      case 0xdc: return this.readArray(this.uint(2));
+      case 0xdd: return this.readArray(this.uint(4));
+      case 0xde: return this.readMap(this.uint(2));
+      case 0xdf: return this.readMap(this.uint(4));
+      default:
+        throw new Error(`Unsupported MessagePack type byte 0x${byte.toString(16)}`);
+    }
+  }
+
+  private uint(size: 1 | 2 | 4): number {
+    const v =
+      size === 1 ? this.view.getUint8(this.offset) :
+      size === 2 ? this.view.getUint16(this.offset) :
+      this.view.getUint32(this.offset);
+    this.offset += size;
+    return v;
+  }
+
+  private readBytes(length: number): Uint8Array {
+    const slice = this.bytes.subarray(this.offset, this.offset + length);
+    this.offset += length;
+    return slice;
+  }
+
+  private readString(length: number): string {
+    return this.textDecoder.decode(this.readBytes(length));
+  }
+
+  private readArray(length: number): MsgpackValue[] {
+    const items: MsgpackValue[] = [];
+    for (let i = 0; i < length; i++) items.push(this.read());
+    return items;
+  }
+
+  private readMap(length: number): { [key: string]: MsgpackValue } {
+    const map: { [key: string]: MsgpackValue } = {};
+    for (let i = 0; i < length; i++) {
+      const key = this.read() as string;
+      map[key] = this.read();
+    }
+    return map;
+  }
+}
+
+type NumericArray = Float64Array | Float32Array | Int32Array;
+
+const toTypedArray = (column: NumericColumn): NumericArray => {
+  // Copy into a fresh, aligned buffer: the bin payload can start at any byte offset.
+  const buffer = column.data.slice().buffer;
+  switch (column.dtype) {
+    case "f8": return new Float64Array(buffer);
+    case "f4": return new Float32Array(buffer);
+    case "i4": return new Int32Array(buffer);
+    // Only sent when a value overflows int32; plain numbers stay exact up to 2^53.
+    case "i8": return Float64Array.from(new BigInt64Array(buffer), Number);
+    default:
+      throw new Error(`Unsupported column dtype: ${String((column as NumericColumn).dtype)}`);
+  }
+};
+
+export type Columns = Record<string, NumericArray | string[]>;
+
+export const decodeColumns = (body: ArrayBuffer): Columns => {
+  const payload = new Reader(new Uint8Array(body)).read() as unknown as ColumnarPayload;
+  if (payload.format !== "columnar") {
+    throw new Error(`Unexpected response format: ${String(payload.format)}`);
+  }
+
+  const columns: Columns = {};
+  for (const [name, column] of Object.entries(payload.columns)) {
+    columns[name] = Array.isArray(column) ? column : toTypedArray(column);
+  }
+  return columns;
+};
+
+// Row view over decoded columns, matching the shape of the JSON responses.
+export const columnsToRows = <T>(columns: Columns): T[] => {
+  const names = Object.keys(columns);
+  const length = names.length ? columns[names[0]].length : 0;
+  const rows: T[] = [];
+  for (let i = 0; i < length; i++) {
+    const row: Record<string, number | string> = {};
+    for (const name of names) row[name] = columns[name][i];
+    rows.push(row as T);
+  }
+  return rows;
+};
+
+// Decode either response flavour the API may send back.
+export const readColumnarOrJson = async <T>(response: Response): Promise<T[]> => {
+  const contentType = response.headers.get("Content-Type") || "";
+  if (contentType.startsWith(COLUMNAR_MIMETYPE)) {
+    return columnsToRows<T>(decodeColumns(await response.arrayBuffer()));
+  }
+  return response.json();
+};
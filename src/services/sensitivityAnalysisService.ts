@@ -1,4 +1,5 @@
 import { type SensitivityParams, type SuccessfulCombination } from '@/pages/SensitivityAnalysis'; // Adjust path as needed
+import { COLUMNAR_ACCEPT, readColumnarOrJson } from '@/lib/columnar';
 
 const API_BASE_URL = import.meta.env.VITE_API_URL || '/'; // Fallback to relative path for Vercel
 
@@ -8,6 +9,7 @@ async function runAnalysis(params: SensitivityParams): Promise<SuccessfulCombina
       method: 'POST',
       headers: {
         'Content-Type': 'application/json',
+        'Accept': COLUMNAR_ACCEPT,
       },
       body: JSON.stringify(params),
     });
@@ -18,7 +20,7 @@ async function runAnalysis(params: SensitivityParams): Promise<SuccessfulCombina
       throw new Error(`API request failed with status ${response.status}: ${errorData.message || response.statusText}`);
     }
 
-    const data: SuccessfulCombination[] = await response.json();
+    const data = await readColumnarOrJson<SuccessfulCombination>(response);
     return data;
   } catch (error) {
     console.error('Error running sensitivity analysis:', error);
@@ -1,5 +1,6 @@
 
 import { SimulationParams, SimulationResult } from "@/types/simulation";
+import { COLUMNAR_ACCEPT, readColumnarOrJson } from "@/lib/columnar";
 
 const API_URL = '/simulate'; // Backend API URL
 
@@ -9,6 +10,8 @@ export const runSimulation = async (params: SimulationParams): Promise<Simulatio
       method: 'POST',
       headers: {
         'Content-Type': 'application/json',
+        // Prefer the compact columnar MessagePack encoding; JSON is still accepted
+        'Accept': COLUMNAR_ACCEPT,
       },
       body: JSON.stringify(params),
     });
@@ -26,7 +29,7 @@ export const runSimulation = async (params: SimulationParams): Promise<Simulatio
       throw new Error(errorMessage);
     }
 
-    const results: SimulationResult[] = await response.json();
+    const results = await readColumnarOrJson<SimulationResult>(response);
     return results;
   } catch (error) {
     console.error("Error calling simulation API:", error);
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""Memory-bounded streaming runs of the batch engine.
+
+simulate_streaming() simulates paths in fixed-size chunks and feeds each
+year's values to aggregate sinks as the engine steps, so nothing of size
+(paths x years) is ever held. Peak memory depends on `chunk_size` and the
+horizon, not on the number of paths: 10^7 paths cost the same memory as 10^5.
+
+Sinks:
+
+- QuantileSketch: per-year quantiles of a series ('total_savings',
+  'total_debt', 'income' or 'expenditure') from log-spaced buckets, accurate
+  to `relative_accuracy` of the true value, plus the per-year mean.
+- Histogram: fixed-edge histogram of a final outcome ('final_savings',
+  'final_debt' or 'debt_years').
+- RuinCounter: per-year number of paths in debt, and of paths falling into
+  debt for the first time.
+
+    python streaming.py --paths 10000000 --current-age 26 --future-age 100 --output bands.csv
+"""
+import argparse
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+from batch_engine import resolve_params, simulate_batch
+from serialization import write_csv
+
+DEFAULT_CHUNK_SIZE = 65536
+SERIES = ('total_savings', 'total_debt', 'income', 'expenditure')
+FINAL_OUTPUTS = ('final_savings', 'final_debt', 'debt_years')
+
+
+class Sink(ABC):
+    """Base class: start() once, update() per chunk-year, finish_chunk() per chunk, result() at the end.
+
+    Only result() is required; the hooks a sink doesn't need default to no-ops.
+    """
+
+    def start(self, max_years):
+        pass
+
+    def update(self, year, active, state):
+        pass
+
+    def finish_chunk(self, result):
+        pass
+
+    @abstractmethod
+    def result(self):
+        """The sink's aggregate as a dict of columns."""
+
+
+class QuantileSketch(Sink):
+    """Per-year quantiles of one series from log-spaced buckets (DDSketch-style).
+
+    Values below `min_value` (including zero) share one bucket and read back
+    as 0; values above `max_value` are clamped into the top bucket.
+    """
+
+    def __init__(self, series='total_savings', quantiles=(0.1, 0.25, 0.5, 0.75, 0.9), relative_accuracy=0.01,
+                 min_value=0.01, max_value=1e8):
+        if series not in SERIES:
+            raise ValueError(f"Unknown series '{series}', expected one of {', '.join(SERIES)}")
+        self.series = series
+        self.quantiles = tuple(quantiles)
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.min_value = min_value
+        self.num_buckets = int(np.ceil(np.log(max_value / min_value) / np.log(self.gamma))) + 2
+
+    def start(self, max_years):
+        self.counts = np.zeros((max_years + 1, self.num_buckets), dtype=np.int64)
+        self.sums = np.zeros(max_years + 1)
+
+    def update(self, year, active, state):
+        values = state[self.series][active]
+        with np.errstate(divide='ignore'):
+            buckets = np.ceil(np.log(np.maximum(values, self.min_value) / self.min_value) / np.log(self.gamma)).astype(np.int64) + 1
+        buckets = np.where(values < self.min_value, 0, np.minimum(buckets, self.num_buckets - 1))
+        self.counts[year] += np.bincount(buckets, minlength=self.num_buckets)
+        self.sums[year] += values.sum()
+
+    def merge(self, other):
+        self.counts += other.counts
+        self.sums += other.sums
+
+    def quantile(self, q):
+        """Per-year estimate of quantile `q` (NaN for years no path reached)."""
+        totals = self.counts.sum(axis=1)
+        cumulative = np.cumsum(self.counts, axis=1)
+        bucket = (cumulative <= q * (totals[:, None] - 1)).sum(axis=1)
+        values = self.min_value * 2 * self.gamma ** (bucket - 1) / (1 + self.gamma) # Bucket b covers (min * g^(b-2), min * g^(b-1)]
+        values = np.where(bucket == 0, 0.0, values)
+        return np.where(totals > 0, values, np.nan)
+
+    def result(self):
+        totals = self.counts.sum(axis=1)
+        columns = {f'{self.series}_mean': np.divide(self.sums, totals, out=np.full(len(totals), np.nan), where=totals > 0)}
+        for q in self.quantiles:
+            columns[f'{self.series}_p{q * 100:g}'] = self.quantile(q)
+        return columns
+
+
+class Histogram(Sink):
+    """Histogram of a final per-path outcome over fixed `edges` (out-of-range values go to the end bins)."""
+
+    def __init__(self, output='final_savings', edges=None):
+        if output not in FINAL_OUTPUTS:
+            raise ValueError(f"Unknown output '{output}', expected one of {', '.join(FINAL_OUTPUTS)}")
+        self.output = output
+        self.edges = np.asarray(edges if edges is not None else np.linspace(0, 10000, 51), dtype=float)
+        self.counts = np.zeros(len(self.edges) - 1, dtype=np.int64)
+
+    def finish_chunk(self, result):
+        bins = np.clip(np.searchsorted(self.edges, result[self.output], side='right') - 1, 0, len(self.counts) - 1)
+        self.counts += np.bincount(bins, minlength=len(self.counts))
+
+    def merge(self, other):
+        self.counts += other.counts
+
+    def result(self):
+        return {'bin_low': self.edges[:-1], 'bin_high': self.edges[1:], 'paths': self.counts}
+
+
+class RuinCounter(Sink):
+    """Per-year count of paths in debt and of paths entering debt for the first time."""
+
+    def start(self, max_years):
+        self.paths = np.zeros(max_years + 1, dtype=np.int64)
+        self.in_debt = np.zeros(max_years + 1, dtype=np.int64)
+        self.first_ruin = np.zeros(max_years + 1, dtype=np.int64)
+        self._ruined = None
+
+    def update(self, year, active, state):
+        in_debt = (state['total_debt'] > 0) & active
+        if year == 0:
+            self._ruined = np.zeros(len(active), dtype=bool) # Per-chunk state, reset for each chunk
+        self.paths[year] += active.sum()
+        self.in_debt[year] += in_debt.sum()
+        self.first_ruin[year] += (in_debt & ~self._ruined).sum()
+        self._ruined |= in_debt
+
+    def merge(self, other):
+        self.paths += other.paths
+        self.in_debt += other.in_debt
+        self.first_ruin += other.first_ruin
+
+    def result(self):
+        return {
+            'paths': self.paths,
+            'paths_in_debt': self.in_debt,
+            'first_in_debt': self.first_ruin,
+            'ever_in_debt_pct': np.cumsum(self.first_ruin) / max(self.paths[0], 1) * 100,
+        }
+
+
+def _chunk_params(params, start, stop, n_paths):
+    """Slice any per-path parameter arrays down to the current chunk."""
+    chunk = {}
+    for name, value in (params or {}).items():
+        if np.ndim(value) and not isinstance(value, str):
+            value = np.asarray(value)
+            if value.shape != (n_paths,):
+                raise ValueError(f"Per-path parameter '{name}' has shape {value.shape}, expected ({n_paths},)")
+            value = value[start:stop]
+        chunk[name] = value
+    return chunk
+
+
+def simulate_streaming(n_paths, sinks, params=None, seed=None, chunk_size=DEFAULT_CHUNK_SIZE, events=None):
+    """Simulate `n_paths` lives chunk by chunk, feeding every sink in `sinks` ({name: Sink}).
+
+    Returns {'year': year offsets, name: sink.result(), ...}. Each chunk draws
+    from its own child of SeedSequence(seed), so a seeded run is reproducible
+    for a given chunk_size.
+    """
+    resolved = resolve_params(params, events)
+    max_years = int(np.max(np.asarray(resolved['future_age']) - np.asarray(resolved['current_age'])))
+    for sink in sinks.values():
+        sink.start(max_years)
+
+    def on_year(year, active, state):
+        for sink in sinks.values():
+            sink.update(year, active, state)
+
+    starts = range(0, n_paths, chunk_size)
+    for start, child in zip(starts, np.random.SeedSequence(seed).spawn(len(starts))):
+        stop = min(start + chunk_size, n_paths)
+        result = simulate_batch(stop - start, _chunk_params(params, start, stop, n_paths), rng=np.random.default_rng(child),
+                                events=events, on_year=on_year)
+        for sink in sinks.values():
+            sink.finish_chunk(result)
+
+    output = {'year': np.arange(max_years + 1)}
+    output.update({name: sink.result() for name, sink in sinks.items()})
+    return output
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-age savings/debt bands over very many paths in flat memory.")
+    parser.add_argument('--paths', type=int, default=1000000)
+    parser.add_argument('--income', type=float, default=20.0, help="initial annual income in lakhs (default: 20)")
+    parser.add_argument('--expenditure', type=float, default=4.0, help="initial annual expenditure in lakhs (default: 4)")
+    parser.add_argument('--capital', type=float, default=20.0, help="initial capital in lakhs (default: 20)")
+    parser.add_argument('--current-age', type=int, default=26)
+    parser.add_argument('--future-age', type=int, default=60)
+    parser.add_argument('--luck', choices=['unlucky', 'neutral', 'lucky'], default='neutral')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='-', help="CSV output file, or - for stdout (default: -)")
+    args = parser.parse_args(argv)
+
+    params = {
+        'initial_income': args.income,
+        'initial_expenditure': args.expenditure,
+        'initial_capital': args.capital,
+        'current_age': args.current_age,
+        'future_age': args.future_age,
+        'luck_factor': args.luck,
+    }
+    sinks = {'savings': QuantileSketch('total_savings'), 'debt': QuantileSketch('total_debt'), 'ruin': RuinCounter()}
+    output = simulate_streaming(args.paths, sinks, params, seed=args.seed, chunk_size=args.chunk_size)
+
+    columns = {'age': output['year'] + args.current_age}
+    for name in sinks:
+        columns.update(output[name])
+    write_csv(columns, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,256 @@
+"""N-dimensional parameter sweeps on the batch engine.
+
+A sweep varies any set of batch_engine parameters (person settings, financial
+assumptions, individual chaos event parameters) over a design:
+
+- 'factorial': every combination of each dimension's values;
+- 'lhs': Latin hypercube sample of `num_points` points;
+- 'sobol': scrambled Sobol sequence of `num_points` points (needs SciPy).
+
+Dimensions are given as {name: spec}, where spec is either
+{'values': [...]} (factorial only), or {'low': a, 'high': b} with an optional
+'levels' count used to build the factorial grid.
+
+All design points are simulated together: each point is repeated for
+`paths_per_point` paths and the whole design is fed to simulate_batch as
+per-path parameter arrays, chunked to bound memory and optionally spread over
+a process pool. With resolution='monthly' the points run on
+monthly_engine.simulate_monthly instead.
+"""
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from batch_engine import ATTRIBUTION_CAUSES, INTEGER_PARAMS, TiledGenerator, default_params, simulate_batch
+from monthly_engine import simulate_monthly
+
+DESIGNS = ('factorial', 'lhs', 'sobol')
+
+# Upper bound on paths simulated in one simulate_batch call.
+MAX_PATHS_PER_BATCH = 250000
+
+
+def _check_dimension(name, spec, design):
+    """Reject a dimension spec that doesn't fit the design, with a readable message."""
+    if not isinstance(spec, dict):
+        raise ValueError(f"Dimension '{name}' must be {{'low': a, 'high': b}} or {{'values': [...]}}")
+    if 'values' in spec:
+        if design != 'factorial':
+            raise ValueError(f"Dimension '{name}': 'values' is only valid for factorial designs; give 'low'/'high' for {design}")
+        if len(spec['values']) == 0:
+            raise ValueError(f"Dimension '{name}': 'values' must not be empty")
+        return
+    if 'low' not in spec or 'high' not in spec:
+        raise ValueError(f"Dimension '{name}' needs 'low' and 'high' (or 'values' for a factorial design)")
+    if design == 'factorial' and int(spec.get('levels', 5)) < 1:
+        raise ValueError(f"Dimension '{name}': 'levels' must be at least 1")
+
+
+def _dimension_values(name, spec):
+    if 'values' in spec:
+        return [float(v) for v in spec['values']]
+    levels = int(spec.get('levels', 5))
+    return np.linspace(float(spec['low']), float(spec['high']), levels).tolist()
+
+
+def _unit_design(design, num_points, num_dims, rng):
+    """Points in the unit hypercube, shape (num_points, num_dims)."""
+    if design == 'lhs':
+        strata = np.stack([rng.permutation(num_points) for _ in range(num_dims)], axis=1)
+        return (strata + rng.random((num_points, num_dims))) / num_points
+    if design == 'sobol':
+        from scipy.stats import qmc # Only Sobol designs need SciPy
+        sampler = qmc.Sobol(d=num_dims, scramble=True, seed=rng)
+        return sampler.random(num_points)
+    raise ValueError(f"Unknown design '{design}', expected one of {', '.join(DESIGNS)}")
+
+
+def build_design(dimensions, design='factorial', num_points=None, seed=None):
+    """Return the design as {name: array of point values}, one entry per swept dimension."""
+    if not dimensions:
+        raise ValueError("A sweep needs at least one dimension")
+    if design not in DESIGNS:
+        raise ValueError(f"Unknown design '{design}', expected one of {', '.join(DESIGNS)}")
+    known = default_params()
+    for name in dimensions:
+        if name not in known:
+            raise KeyError(f"Unknown simulation parameter '{name}'")
+        _check_dimension(name, dimensions[name], design)
+
+    names = list(dimensions)
+    if design == 'factorial':
+        grids = [_dimension_values(name, dimensions[name]) for name in names]
+        points = np.array(list(itertools.product(*grids)), dtype=float).reshape(-1, len(names))
+    else:
+        if not num_points or int(num_points) < 1:
+            raise ValueError(f"A '{design}' design needs num_points of at least 1")
+        rng = np.random.default_rng(seed)
+        unit = _unit_design(design, int(num_points), len(names), rng)
+        lows = np.array([float(dimensions[name]['low']) for name in names])
+        highs = np.array([float(dimensions[name]['high']) for name in names])
+        points = lows + unit * (highs - lows)
+
+    columns = {}
+    for index, name in enumerate(names):
+        values = points[:, index]
+        columns[name] = np.rint(values).astype(np.int64) if name in INTEGER_PARAMS else values
+    return columns
+
+
+STATISTICS = (
+    'success_rate_pct',
+    'debt_probability',
+    'average_final_savings',
+    'median_final_savings',
+    'p10_final_savings',
+    'average_debt_incurred_years',
+    'ruin_probability',
+    'in_debt_at_retirement',
+)
+
+
+RESOLUTIONS = ('annual', 'monthly')
+MONTHLY_STATISTICS = ('average_debt_months', 'p90_peak_debt', 'p90_longest_income_gap_months')
+
+
+def statistics(attribution=False, resolution='annual'):
+    """Names of the per-point statistics, including the per-cause attribution and monthly columns if requested."""
+    names = STATISTICS
+    if resolution == 'monthly':
+        names += MONTHLY_STATISTICS
+    if attribution:
+        names += tuple(f'{cause}{suffix}' for cause in ATTRIBUTION_CAUSES for suffix in ('_impact', '_impact_in_debt'))
+    return names
+
+
+def _ruin_probability(result, num_points, paths_per_point):
+    """Per point, the share of lives retiring out of debt whose savings later run out (NaN if none retire solvent)."""
+    ruined = (~np.isnan(result['ruin_age'])).reshape(num_points, paths_per_point).sum(axis=1)
+    solvent = (result['reached_retirement'] & ~result['in_debt_at_retirement']).reshape(num_points, paths_per_point).sum(axis=1)
+    return np.divide(ruined, solvent, out=np.full(num_points, np.nan), where=solvent > 0)
+
+
+def _run_chunk(point_values, fixed, paths_per_point, success_threshold_savings, seed, common_random_numbers=False,
+               attribution=False, resolution='annual', events=None):
+    """Simulate one chunk of design points and reduce each to its summary statistics."""
+    num_points = len(next(iter(point_values.values())))
+    params = dict(fixed)
+    for name, values in point_values.items():
+        params[name] = np.repeat(values, paths_per_point)
+
+    rng = np.random.default_rng(seed)
+    if common_random_numbers:
+        rng = TiledGenerator(rng, paths_per_point)
+    if resolution == 'monthly':
+        result = simulate_monthly(num_points * paths_per_point, params, rng=rng, attribution=attribution, events=events)
+    else:
+        result = simulate_batch(num_points * paths_per_point, params, rng=rng, attribution=attribution, events=events)
+    final_savings = result['final_savings'].reshape(num_points, paths_per_point)
+    final_debt = result['final_debt'].reshape(num_points, paths_per_point)
+    debt_years = result['debt_years'].reshape(num_points, paths_per_point)
+
+    stats = {
+        'success_rate_pct': (final_savings >= success_threshold_savings).mean(axis=1) * 100,
+        'debt_probability': (final_debt > 0).mean(axis=1),
+        'average_final_savings': final_savings.mean(axis=1),
+        'median_final_savings': np.median(final_savings, axis=1),
+        'p10_final_savings': np.percentile(final_savings, 10, axis=1),
+        'average_debt_incurred_years': debt_years.mean(axis=1),
+        'ruin_probability': _ruin_probability(result, num_points, paths_per_point),
+        'in_debt_at_retirement': result['in_debt_at_retirement'].reshape(num_points, paths_per_point).mean(axis=1),
+    }
+    if resolution == 'monthly':
+        stats['average_debt_months'] = result['debt_months'].reshape(num_points, paths_per_point).mean(axis=1)
+        stats['p90_peak_debt'] = np.percentile(result['peak_debt'].reshape(num_points, paths_per_point), 90, axis=1)
+        stats['p90_longest_income_gap_months'] = np.percentile(
+            result['longest_income_gap_months'].reshape(num_points, paths_per_point), 90, axis=1)
+    if attribution:
+        in_debt = final_debt > 0
+        debt_paths = in_debt.sum(axis=1)
+        for cause, impact in result['attribution'].items():
+            impact = impact.reshape(num_points, paths_per_point)
+            stats[f'{cause}_impact'] = impact.mean(axis=1)
+            stats[f'{cause}_impact_in_debt'] = np.divide((impact * in_debt).sum(axis=1), debt_paths,
+                                                         out=np.full(num_points, np.nan), where=debt_paths > 0)
+    return stats
+
+
+def evaluate_points(point_columns, paths_per_point=100, fixed=None, success_threshold_savings=200, seed=None, workers=None,
+                    common_random_numbers=False, attribution=False, resolution='annual', events=None):
+    """Simulate every point of an explicit design and return its summary statistics.
+
+    `point_columns` maps parameter names to equal-length arrays of point values.
+    Returns {statistic: array} with one entry per point (see run_sweep). Points
+    are packed `MAX_PATHS_PER_BATCH // paths_per_point` to a batch; with
+    `workers` > 1 batches run in a process pool; only their per-point
+    statistics travel back, never the per-path arrays. Results are
+    reproducible for a given `seed`, whatever the worker count. With
+    `common_random_numbers`, every point is simulated on the same
+    `paths_per_point` random streams. With `attribution`, the statistics also
+    break outcomes down by cause (see run_sweep). `resolution` picks the annual
+    or monthly engine, and `events` replaces the default chaos_events tables.
+    """
+    if resolution not in RESOLUTIONS:
+        raise ValueError(f"Unknown resolution '{resolution}', expected one of {', '.join(RESOLUTIONS)}")
+    if paths_per_point < 1:
+        raise ValueError(f"paths_per_point must be at least 1, got {paths_per_point}")
+    total_points = len(next(iter(point_columns.values())))
+    points_per_chunk = max(1, MAX_PATHS_PER_BATCH // paths_per_point)
+    num_chunks = (total_points + points_per_chunk - 1) // points_per_chunk
+    if common_random_numbers:
+        seeds = [np.random.SeedSequence(seed)] * num_chunks
+    else:
+        seeds = np.random.SeedSequence(seed).spawn(num_chunks)
+    chunks = []
+    for index, start in enumerate(range(0, total_points, points_per_chunk)):
+        stop = min(start + points_per_chunk, total_points)
+        point_values = {name: np.asarray(values)[start:stop] for name, values in point_columns.items()}
+        chunks.append((point_values, fixed or {}, paths_per_point, success_threshold_savings, seeds[index], common_random_numbers, attribution, resolution, events))
+
+    if workers and workers > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            summaries = [future.result() for future in [pool.submit(_run_chunk, *chunk) for chunk in chunks]]
+    else:
+        summaries = [_run_chunk(*chunk) for chunk in chunks]
+    return {stat: np.concatenate([summary[stat] for summary in summaries]) for stat in statistics(attribution, resolution)}
+
+
+def warm_up():
+    """Run every sweep path once: SciPy designs, correlated shocks, attribution and the monthly engine.
+
+    A preloading server calls this before forking so workers inherit the
+    loaded modules instead of each paying for them on its first request.
+    """
+    dimension = {'initial_income': {'low': 10, 'high': 20}}
+    run_sweep(dimension, design='sobol', num_points=2, paths_per_point=2, seed=0, attribution=True,
+              fixed={'shock_correlation.market_crash.job_loss': 0.5})
+    run_sweep(dimension, design='lhs', num_points=2, paths_per_point=2, seed=0, resolution='monthly')
+
+
+def run_sweep(dimensions, design='factorial', num_points=None, paths_per_point=100, fixed=None,
+              success_threshold_savings=200, seed=None, workers=None, attribution=False, resolution='annual', events=None):
+    """Run a sweep and return {column: array}, one row per design point.
+
+    The columns are the swept parameters followed by the per-point statistics:
+    success rate against `success_threshold_savings`, probability of ending in
+    debt, mean/median/10th-percentile final savings, mean years in debt, the
+    probability that savings run out after retirement (among lives that
+    retire out of debt) and the share of lives already in debt at
+    retirement. `fixed` holds values for parameters that are not swept.
+
+    With `attribution`, two columns per cause in
+    batch_engine.ATTRIBUTION_CAUSES follow: '<cause>_impact', the cause's mean
+    effect on savings over all paths, and '<cause>_impact_in_debt', the same
+    over the paths that end in debt (NaN if none do).
+
+    With resolution='monthly', points run on the monthly engine and three
+    more columns follow: mean months ending in debt, and the 90th percentiles
+    of peak debt (the emergency fund that would have covered 90% of lives) and
+    of the longest run of months without income.
+    """
+    design_columns = build_design(dimensions, design, num_points, seed)
+    columns = dict(design_columns)
+    columns.update(evaluate_points(design_columns, paths_per_point, fixed, success_threshold_savings, seed, workers,
+                                   attribution=attribution, resolution=resolution, events=events))
+    return columns
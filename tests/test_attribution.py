@@ -0,0 +1,57 @@
+import numpy as np
+
+from batch_engine import ATTRIBUTION_CAUSES, simulate_batch
+from sweep import run_sweep
+
+# No returns, crashes or savings-proportional events, and enough capital never to borrow:
+# each remaining cost or windfall then moves final savings by exactly its own amount
+ADDITIVE = {'base_equity_return_rate': 0.0, 'base_fd_return_rate': 0.0, 'initial_capital': 5000.0, 'market_crash.prob': 0.0,
+            'black_swan.prob': 0.0, 'business_venture.prob_in_window_annual': 0.0, 'divorce.prob_if_married_annual': 0.0}
+SWITCHED_OFF = {'medical_emergency': {'medical_emergency.base_prob': 0.0, 'medical_emergency.age_factor': 0.0},
+                'family_expense': {'family_expense.prob': 0.0},
+                'inheritance': {'inheritance.prob_in_window_annual': 0.0}}
+
+
+def test_attributions_sum_to_the_outcome_gap():
+    without = {name: value for params in SWITCHED_OFF.values() for name, value in params.items()}
+    full = simulate_batch(2000, ADDITIVE, rng=np.random.default_rng(1), attribution=True)
+    baseline = simulate_batch(2000, {**ADDITIVE, **without}, rng=np.random.default_rng(1))
+
+    assert not (full['final_debt'] > 0).any()
+    gap = full['final_savings'] - baseline['final_savings']
+    assert np.abs(gap).max() > 10 # The events did happen
+    np.testing.assert_allclose(sum(full['attribution'][cause] for cause in SWITCHED_OFF), gap, atol=1e-8)
+
+
+def test_impacts_have_the_sign_of_their_cause():
+    attribution = simulate_batch(5000, rng=np.random.default_rng(2), attribution=True)['attribution']
+    assert set(attribution) == set(ATTRIBUTION_CAUSES)
+    # Black swan and divorce take a share of savings, which can be briefly overdrawn, so they have no fixed sign
+    for cause in ('job_loss', 'medical_emergency', 'market_crash', 'family_expense', 'children'):
+        assert (attribution[cause] <= 0).all() and (attribution[cause] < 0).any(), cause
+    assert (attribution['inheritance'] >= 0).all() and (attribution['inheritance'] > 0).any()
+    assert (attribution['business_venture'] > 0).any() and (attribution['business_venture'] < 0).any() # Ventures go either way
+
+
+def test_sweep_reports_impacts_for_the_paths_in_debt():
+    columns = run_sweep({'initial_income': {'values': [10, 40]}}, paths_per_point=500, seed=3, attribution=True)
+    for cause in ATTRIBUTION_CAUSES:
+        assert f'{cause}_impact' in columns and f'{cause}_impact_in_debt' in columns
+    # Lives that end in debt lost more to job loss than the average life
+    assert (columns['job_loss_impact_in_debt'] < columns['job_loss_impact']).all()
+
+
+def test_sensitivity_analysis_forwards_attribution():
+    from api import app
+    client = app.test_client()
+    body = {'income_min': 10, 'income_max': 20, 'income_step': 10, 'capital_min': 10, 'capital_max': 10, 'capital_step': 10,
+            'num_simulations_per_combination': 200}
+    plain = client.post('/sensitivity_analysis', json=body).get_json()
+    rows = client.post('/sensitivity_analysis', json={**body, 'attribution': True}).get_json()
+
+    assert len(rows) == len(plain) == 2
+    assert not any(name.endswith('_impact') for name in plain[0])
+    for cause in ATTRIBUTION_CAUSES:
+        assert f'{cause}_impact' in rows[0] and f'{cause}_impact_in_debt' in rows[0]
+    assert set(plain[0]) < set(rows[0]) # Attribution only adds columns
+    assert all(row['job_loss_impact'] < 0 for row in rows)
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from batch_engine import SHOCK_EVENTS, _correlated_uniforms, _shock_cholesky, path_params, simulate_batch
+
+CRASH, JOB = SHOCK_EVENTS.index('market_crash'), SHOCK_EVENTS.index('job_loss')
+
+
+def _crash_job_uniforms(n_paths, correlation, seed):
+    cholesky = _shock_cholesky(path_params(n_paths, {'shock_correlation.market_crash.job_loss': correlation}), n_paths)
+    return _correlated_uniforms(np.random.default_rng(seed), cholesky, n_paths)
+
+
+def test_shocks_keep_their_marginals_and_cluster():
+    n_paths = 200000
+    uniforms = _crash_job_uniforms(n_paths, 0.8, seed=1)
+
+    # Each event still fires at its own rate...
+    np.testing.assert_allclose(np.quantile(uniforms, [0.1, 0.5, 0.9], axis=0).T, [[0.1, 0.5, 0.9]] * len(SHOCK_EVENTS), atol=0.01)
+    # ...but crash and job loss now come together far more often than independent 10% events would (1%)
+    both = ((uniforms[:, CRASH] < 0.1) & (uniforms[:, JOB] < 0.1)).mean()
+    assert both > 0.04
+    # Uncorrelated pairs stay independent
+    other = SHOCK_EVENTS.index('black_swan')
+    assert ((uniforms[:, CRASH] < 0.1) & (uniforms[:, other] < 0.1)).mean() == pytest.approx(0.01, abs=0.002)
+
+
+def test_per_path_correlations():
+    n_paths = 100000
+    correlation = np.repeat([0.0, 0.9], n_paths // 2)
+    uniforms = _crash_job_uniforms(n_paths, correlation, seed=2)
+    independent, correlated = uniforms[:n_paths // 2], uniforms[n_paths // 2:]
+    assert np.corrcoef(independent[:, CRASH], independent[:, JOB])[0, 1] == pytest.approx(0, abs=0.02)
+    assert np.corrcoef(correlated[:, CRASH], correlated[:, JOB])[0, 1] > 0.85
+
+
+def test_clustered_shocks_fatten_the_debt_tail():
+    correlated = {f'shock_correlation.{a}.{b}': 0.8
+                  for a, b in [('market_crash', 'job_loss'), ('market_crash', 'medical_emergency'), ('job_loss', 'medical_emergency')]}
+    independent = simulate_batch(20000, rng=np.random.default_rng(5))
+    clustered = simulate_batch(20000, correlated, rng=np.random.default_rng(5))
+    assert (clustered['final_debt'] > 0).mean() > (independent['final_debt'] > 0).mean() + 0.01
+
+
+def test_matrix_must_be_positive_definite():
+    impossible = {'shock_correlation.market_crash.job_loss': 0.9, 'shock_correlation.market_crash.black_swan': 0.9,
+                  'shock_correlation.job_loss.black_swan': -0.9}
+    with pytest.raises(ValueError, match='positive definite'):
+        simulate_batch(10, impossible, rng=np.random.default_rng(0))
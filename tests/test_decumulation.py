@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from batch_engine import simulate_batch
+from decumulation import compare_strategies
+from sweep import _ruin_probability, run_sweep
+
+RETIREMENT = {'future_age': 90, 'retirement_age': 60}
+
+
+def test_ruin_age_counts_only_solvent_retirements():
+    params = {'future_age': 90, 'retirement_age': 60, 'luck_factor': 'unlucky'}
+    result = simulate_batch(5000, params, rng=np.random.default_rng(6))
+    ruined = ~np.isnan(result['ruin_age'])
+
+    assert result['reached_retirement'].all()
+    assert result['in_debt_at_retirement'].any() and ruined.any()
+    # A life already in debt when it retires was not ruined by its drawdown
+    assert not (ruined & result['in_debt_at_retirement']).any()
+    assert ((result['ruin_age'][ruined] > 60) & (result['ruin_age'][ruined] <= 90)).all()
+
+
+def test_ruin_probability_is_over_solvent_retirees():
+    columns = run_sweep({'initial_income': {'values': [20]}}, paths_per_point=200, seed=1, fixed={'future_age': 60})
+    assert np.isnan(columns['ruin_probability']).all()
+    assert (columns['in_debt_at_retirement'] == 0).all()
+
+    # Half the lives end before retirement and must not dilute the rate
+    result = simulate_batch(4000, {'future_age': np.repeat([55, 90], 2000)}, rng=np.random.default_rng(8))
+    ruined = ~np.isnan(result['ruin_age'])
+    solvent = result['reached_retirement'] & ~result['in_debt_at_retirement']
+    assert solvent[:2000].sum() == 0
+    assert _ruin_probability(result, 1, 4000)[0] == pytest.approx(ruined.sum() / solvent.sum())
+
+
+def test_strategies_share_lives_and_differ_only_in_drawdown():
+    comparison = compare_strategies(paths_per_strategy=2000, params=RETIREMENT, seed=3)
+    summary = dict(zip(comparison['summary']['strategy'], comparison['summary']['ruin_probability']))
+
+    # Common random numbers: every strategy sees the same lives up to retirement
+    assert len(set(comparison['summary']['in_debt_at_retirement'])) == 1
+    # Spending a share of what is left can never empty the pot; a fixed real draw can
+    assert summary['percentage'] < summary['fixed_real']
+    assert summary['guardrails'] < summary['fixed_real']
+
+    by_age = comparison['ruin_by_age']
+    assert by_age['age'][0] == 61 and by_age['age'][-1] == 90
+    for name, probability in summary.items():
+        assert (np.diff(by_age[name]) >= 0).all(), name
+        assert by_age[name][-1] == pytest.approx(probability * 100), name
+
+
+def test_ruin_is_nan_without_solvent_retirees():
+    # Nobody reaches retirement, so there is no ruin rate to report
+    comparison = compare_strategies(['percentage', 'fixed_real'], 200, {'future_age': 55}, seed=1)
+    assert np.isnan(comparison['summary']['ruin_probability']).all()
+    assert np.isnan(comparison['ruin_by_age']['percentage']).all()
+    assert np.isnan(comparison['ruin_by_age']['fixed_real']).all()
+
+
+def test_unknown_strategy_is_rejected():
+    with pytest.raises(ValueError, match='withdrawal strategy'):
+        compare_strategies(['annuity'], 10)
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from distributed import SweepCoordinator, merge_aggregates, run_distributed_sweep, simulate_unit
+from scenarios import registry
+
+DIMENSIONS = {'initial_income': {'low': 10, 'high': 40, 'levels': 4}, 'initial_capital': {'values': [0, 50]}}
+
+
+def test_distributed_sweep_is_independent_of_worker_count():
+    tables = []
+    for workers in (1, 3):
+        # Three units per cell, merged in unit order whichever worker ran them
+        coordinator = SweepCoordinator(DIMENSIONS, paths_per_cell=300, paths_per_unit=100, seed=5)
+        tables.append(run_distributed_sweep(coordinator, port=0, local_workers=workers, progress=False))
+    for name in tables[0]:
+        np.testing.assert_array_equal(tables[0][name], tables[1][name], err_msg=name)
+    assert (tables[0]['num_paths'] == 300).all()
+
+
+def test_scenario_events_reach_the_workers():
+    scenario = registry.get('recession')
+    dimensions = {'initial_income': {'values': [20, 30]}}
+    coordinator = SweepCoordinator(dimensions, paths_per_cell=200, paths_per_unit=100, seed=2,
+                                   fixed=scenario.batch_params(), events=scenario.events)
+    table = run_distributed_sweep(coordinator, port=0, local_workers=2, progress=False)
+
+    def local_savings(coordinator):
+        # The same units run in this process
+        return [merge_aggregates([unit_result for unit, unit_result in zip(coordinator.units, map(simulate_unit, coordinator.units))
+                                  if unit['cell'] == cell])['sum_final_savings'] / 200 for cell in range(2)]
+
+    np.testing.assert_allclose(table['average_final_savings'], local_savings(coordinator), rtol=1e-12)
+    default = SweepCoordinator(dimensions, paths_per_cell=200, paths_per_unit=100, seed=2)
+    assert not np.allclose(table['average_final_savings'], local_savings(default))
+
+
+def test_failing_unit_aborts_after_max_attempts():
+    coordinator = SweepCoordinator({'initial_income': {'values': [20]}}, paths_per_cell=10, max_attempts=2)
+    for _ in range(2):
+        unit = coordinator.lease()['unit']
+        coordinator.fail(unit['id'], 'ValueError: boom')
+    assert coordinator.finished.is_set()
+    with pytest.raises(RuntimeError, match='boom'):
+        coordinator.table()
+
+
+def test_bad_fixed_params_are_rejected_up_front():
+    with pytest.raises(KeyError):
+        SweepCoordinator(DIMENSIONS, fixed={'no_such_param': 1})
@@ -0,0 +1,63 @@
+import random
+
+import numpy as np
+import pytest
+
+from batch_engine import simulate_batch
+from scenarios import registry
+from simulation_core import run_financial_simulation
+from sweep import run_sweep
+
+
+@pytest.mark.parametrize('luck_factor', ['unlucky', 'neutral', 'lucky'])
+def test_batch_engine_matches_scalar_engine(luck_factor):
+    rng = random.Random(2)
+    scalar = [run_financial_simulation(20, 4, 20, 26, 60, luck_factor, as_columns=True, rng=rng) for _ in range(3000)]
+    scalar_savings = np.array([columns['totalSavings'][-1] for columns in scalar])
+    scalar_in_debt = np.array([columns['totalDebt'][-1] > 0 for columns in scalar])
+
+    batch = simulate_batch(20000, {'luck_factor': luck_factor}, rng=np.random.default_rng(2))
+
+    # Four standard errors of the scalar estimate, so a real model drift fails but sampling noise doesn't
+    savings_tolerance = 4 * scalar_savings.std() / np.sqrt(len(scalar_savings))
+    assert batch['final_savings'].mean() == pytest.approx(scalar_savings.mean(), abs=savings_tolerance)
+    assert (batch['final_debt'] > 0).mean() == pytest.approx(scalar_in_debt.mean(), abs=0.04)
+
+
+# Default outputs from before the streaming, withdrawal, copula, attribution,
+# monthly and scenario changes (batch engine at seed 3, sweep at seed 11)
+PINNED_BATCH = {'final_savings': 900.8608565082469, 'in_debt': 0.254, 'debt_years': 2.788}
+PINNED_SWEEP = {
+    'success_rate_pct': [16.2, 64.4, 87.4],
+    'debt_probability': [0.756, 0.27, 0.086],
+    'average_final_savings': [136.9835567854449, 866.9567256135946, 1863.8753338912097],
+    'median_final_savings': [0.0, 532.509376638504, 1631.8843428786718],
+    'p10_final_savings': [0.0, 0.0, 116.0147691952788],
+    'average_debt_incurred_years': [13.504, 2.856, 0.774],
+}
+
+
+def test_default_batch_output_is_unchanged():
+    result = simulate_batch(2000, rng=np.random.default_rng(3))
+    assert result['final_savings'].mean() == pytest.approx(PINNED_BATCH['final_savings'], rel=1e-12)
+    assert (result['final_debt'] > 0).mean() == PINNED_BATCH['in_debt']
+    assert result['debt_years'].mean() == PINNED_BATCH['debt_years']
+
+
+def test_default_sweep_output_is_unchanged():
+    columns = run_sweep({'initial_income': {'low': 10, 'high': 30, 'levels': 3}}, paths_per_point=500, seed=11)
+    for name, expected in PINNED_SWEEP.items():
+        assert columns[name] == pytest.approx(expected, rel=1e-12), name
+
+
+def test_optional_features_leave_default_paths_alone():
+    plain = simulate_batch(2000, rng=np.random.default_rng(4))
+    scenario = registry.get('default')
+    variants = [
+        simulate_batch(2000, scenario.batch_params(), rng=np.random.default_rng(4), events=scenario.events),
+        simulate_batch(2000, {'shock_correlation.market_crash.job_loss': 0.0}, rng=np.random.default_rng(4)),
+        simulate_batch(2000, rng=np.random.default_rng(4), attribution=True, on_year=lambda year, active, state: None),
+    ]
+    for variant in variants:
+        for name in ('final_savings', 'final_debt', 'debt_years'):
+            np.testing.assert_array_equal(variant[name], plain[name])
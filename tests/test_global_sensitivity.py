@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from global_sensitivity import event_parameter_ranges, global_sensitivity
+
+
+def test_default_ranges_keep_each_parameter_meaningful():
+    ranges = event_parameter_ranges(spread=0.9)
+    for name, (low, high) in ranges.items():
+        assert low <= high, name
+        if 'prob' in name or 'percentage' in name or name.endswith('loss_multiplier'):
+            assert 0 <= low and high <= 1, name
+        if 'multiplier_range' in name:
+            assert low >= 1, name # A boost never becomes a cut
+        if 'salary_drop_range' in name:
+            assert 0 <= low and high <= 1, name # A drop never becomes a raise
+
+
+def test_explicit_ranges_replace_defaults():
+    ranges = event_parameter_ranges(parameters=['job_loss.prob'], ranges={'market_crash.prob': [0.0, 0.3]})
+    assert ranges['market_crash.prob'] == (0.0, 0.3)
+    assert ranges['job_loss.prob'] == pytest.approx((0.04, 0.12))
+    with pytest.raises(ValueError):
+        event_parameter_ranges(ranges={'job_loss.prob': [0.2, 0.1]})
+    with pytest.raises(KeyError):
+        event_parameter_ranges(parameters=['job_loss.no_such_setting'])
+
+
+def test_morris_ranks_job_loss_first_for_debt():
+    columns = global_sensitivity('morris', num_trajectories=20, paths_per_point=200, seed=0)
+    top = columns['parameter'][int(np.argmax(columns['debt_probability_mu_star']))]
+    assert top == 'job_loss.prob'
+
+
+def test_sobol_indices_single_out_the_influential_parameter():
+    # One parameter that matters a lot and one that barely does
+    columns = global_sensitivity('sobol', parameters=['job_loss.prob', 'family_expense.cost_range_lakhs.0'],
+                                 num_samples=64, paths_per_point=100, seed=1)
+    first, total = columns['debt_probability_S1'], columns['debt_probability_ST']
+    assert total[0] > 0.5 > total[1]
+    assert first[0] > first[1]
+    assert np.all(total >= -0.05) and np.all(total <= 1.2)
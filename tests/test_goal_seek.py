@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from batch_engine import simulate_batch
+from goal_seek import goal_seek, wilson_interval
+
+FIXED = {'initial_capital': 20}
+
+
+def _success_probability(income, paths=20000):
+    result = simulate_batch(paths, {**FIXED, 'initial_income': income}, rng=np.random.default_rng(99))
+    return (result['final_debt'] <= 0).mean()
+
+
+def test_wilson_interval():
+    assert wilson_interval(0, 0) == (0.0, 1.0)
+    low, high = wilson_interval(90, 100)
+    assert low < 0.9 < high
+    assert (low, high) == pytest.approx((0.8256, 0.9448), abs=1e-4)
+    assert wilson_interval(100, 100)[1] == 1.0
+    # More trials at the same rate give a narrower interval
+    narrow_low, narrow_high = wilson_interval(900, 1000)
+    assert narrow_high - narrow_low < high - low
+
+
+def test_finds_the_smallest_income_for_the_target():
+    result = goal_seek('initial_income', 5, 100, target_probability=0.9, fixed=FIXED, seed=1)
+    assert result['feasible'] and 5 < result['value'] < 100
+    assert result['ci_low'] <= result['success_probability'] <= result['ci_high']
+    assert result['success_probability'] >= 0.9
+    # Checked on independent paths: a tenth less income misses the target, a tenth more clears it
+    assert _success_probability(result['value'] * 0.9) < 0.9 < _success_probability(result['value'] * 1.1)
+
+    easier = goal_seek('initial_income', 5, 100, target_probability=0.7, fixed=FIXED, seed=1)
+    assert easier['value'] < result['value']
+
+
+def test_bracket_ends():
+    infeasible = goal_seek('initial_income', 5, 8, fixed=FIXED, seed=1)
+    assert infeasible['value'] is None and not infeasible['feasible']
+    assert infeasible['iterations'] == 1
+
+    already_met = goal_seek('initial_income', 60, 100, fixed=FIXED, seed=1)
+    assert already_met['value'] == 60 and already_met['iterations'] == 2
+
+
+def test_integer_parameters_stay_integers():
+    result = goal_seek('retirement_age', 40, 75, target_probability=0.5, fixed={'future_age': 80}, seed=1)
+    assert isinstance(result['value'], int) and 40 < result['value'] <= 75
+
+
+def test_invalid_requests_are_rejected():
+    with pytest.raises(KeyError):
+        goal_seek('salary', 5, 100)
+    with pytest.raises(ValueError, match='target_probability'):
+        goal_seek('initial_income', 5, 100, target_probability=1)
+    with pytest.raises(ValueError, match='high'):
+        goal_seek('initial_income', 100, 5)
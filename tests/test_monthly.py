@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from batch_engine import simulate_batch
+from monthly_engine import simulate_monthly
+from sweep import run_sweep
+
+
+def test_monthly_hazards_keep_the_annual_event_rates():
+    annual = simulate_batch(20000, rng=np.random.default_rng(1), attribution=True)['attribution']
+    monthly = simulate_monthly(20000, rng=np.random.default_rng(1), attribution=True)['attribution']
+    # The share of lives an event touches at least once doesn't depend on the step
+    for cause in ('job_loss', 'medical_emergency', 'family_expense', 'inheritance'):
+        assert (monthly[cause] != 0).mean() == pytest.approx((annual[cause] != 0).mean(), abs=0.02), cause
+
+
+def test_job_losses_last_their_drawn_months():
+    result = simulate_monthly(5000, {'job_loss.min_duration_months': 6, 'job_loss.max_duration_months': 6},
+                              rng=np.random.default_rng(2))
+    gaps = result['longest_income_gap_months']
+    # Shorter gaps are losses cut off by retirement at the end of the horizon
+    assert gaps.max() == 6 and (gaps == 6).mean() > 0.8
+    assert (simulate_monthly(2000, {'job_loss.prob': 0.0}, rng=np.random.default_rng(2))['longest_income_gap_months'] == 0).all()
+
+
+def test_monthly_outputs_are_consistent():
+    result = simulate_monthly(5000, rng=np.random.default_rng(3))
+    assert (result['peak_debt'] >= result['final_debt']).all()
+    # Every year end in debt is also a month end in debt
+    assert (result['debt_months'] >= result['debt_years']).all()
+    assert (result['debt_months'] <= 12 * result['years']).all()
+
+    recorded = simulate_monthly(10, {'future_age': 30}, rng=np.random.default_rng(3), record=True)
+    assert recorded['total_savings'].shape == (10, 12 * 4 + 1)
+    np.testing.assert_array_equal(recorded['total_savings'][:, -1], recorded['final_savings'])
+
+
+def test_monthly_sweep_adds_its_columns():
+    columns = run_sweep({'initial_income': {'values': [10, 30]}}, paths_per_point=300, seed=4, resolution='monthly')
+    for name in ('average_debt_months', 'p90_peak_debt', 'p90_longest_income_gap_months'):
+        assert len(columns[name]) == 2
+    # More income, less time in debt
+    assert columns['average_debt_months'][0] > columns['average_debt_months'][1]
+
+
+def test_monthly_supports_only_expenditure_withdrawals():
+    with pytest.raises(ValueError, match='expenditure'):
+        simulate_monthly(10, {'withdrawal_strategy': 'percentage'})
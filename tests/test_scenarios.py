@@ -0,0 +1,79 @@
+import json
+
+import pytest
+
+from scenarios import ScenarioRegistry, compile_scenario, registry
+from simulation_core import chaos_events, financial_params
+
+
+@pytest.mark.parametrize('document, message', [
+    ({'chaos_events': {'job_loss': {'probability': 0.1}}}, "Unknown setting 'chaos_events.job_loss.probability'"),
+    ({'chaos_events': {'job_loss': {'prob': 1.5}}}, 'between 0 and 1'),
+    ({'chaos_events': {'job_loss': {'prob': 'often'}}}, 'must be a number'),
+    ({'chaos_events': {'job_loss': {'max_duration_months': 2.5}}}, 'whole number'),
+    ({'chaos_events': {'job_loss': {'max_duration_months': 2}}}, 'must not exceed'), # Below the default min of 3
+    ({'chaos_events': {'market_crash': {'return_range': [-0.1, -0.4]}}}, 'low to high'),
+    ({'chaos_events': {'medical_emergency': {'cost_range_lakhs': [-5, 30]}}}, 'must not be negative'),
+    ({'financial_params': {'tax_rate': [0.3]}}, 'must be a number'),
+    ({'settings': {}}, "unknown section 'settings'"),
+])
+def test_invalid_profiles_are_rejected(document, message):
+    with pytest.raises(ValueError, match=message):
+        compile_scenario('broken', document)
+
+
+def test_profiles_merge_onto_the_defaults():
+    scenario = compile_scenario('layoffs', {'chaos_events': {'job_loss': {'prob': 0.2}},
+                                            'financial_params': {'base_equity_return_rate': 0.07}})
+    assert scenario.events['job_loss']['prob'] == 0.2
+    assert scenario.events['job_loss']['max_duration_months'] == chaos_events['job_loss']['max_duration_months']
+    assert scenario.events['market_crash'] == chaos_events['market_crash']
+    assert scenario.batch_params({'initial_income': 30}) == {**financial_params, 'base_equity_return_rate': 0.07, 'initial_income': 30}
+    # Crashes may go below zero
+    compile_scenario('crash', {'chaos_events': {'market_crash': {'return_range': [-0.6, -0.3]}}})
+
+
+def test_hash_follows_content_not_name():
+    document = {'description': 'More layoffs', 'chaos_events': {'job_loss': {'prob': 0.2}}}
+    first = compile_scenario('a', document)
+    assert compile_scenario('b', {**document, 'description': 'Renamed'}).content_hash == first.content_hash
+    assert compile_scenario('c', {'chaos_events': {'job_loss': {'prob': 0.21}}}).content_hash != first.content_hash
+    # Spelling out a default value is the same profile as leaving it out
+    assert compile_scenario('d', {'chaos_events': {'job_loss': {'prob': chaos_events['job_loss']['prob']}}}).content_hash \
+        == registry.get('default').content_hash
+
+
+def test_registry_hot_reloads_profiles(tmp_path):
+    path = tmp_path / 'layoffs.json'
+    scenarios = ScenarioRegistry(str(tmp_path), check_interval=0)
+    with pytest.raises(KeyError):
+        scenarios.get('layoffs')
+
+    path.write_text(json.dumps({'chaos_events': {'job_loss': {'prob': 0.2}}}))
+    first = scenarios.get('layoffs')
+    assert first.events['job_loss']['prob'] == 0.2
+
+    path.write_text(json.dumps({'chaos_events': {'job_loss': {'prob': 0.25, 'max_duration_months': 24}}}))
+    second = scenarios.get('layoffs')
+    assert second.events['job_loss']['prob'] == 0.25 and second.content_hash != first.content_hash
+
+    # A broken edit is reported and the last good version stays in use
+    path.write_text(json.dumps({'chaos_events': {'job_loss': {'prob': 2}}}))
+    assert scenarios.get('layoffs') is second
+    assert 'between 0 and 1' in scenarios.describe()['errors']['layoffs']
+
+    path.unlink()
+    with pytest.raises(KeyError):
+        scenarios.get('layoffs')
+    assert [entry['name'] for entry in scenarios.describe()['scenarios']] == ['default']
+
+
+def test_routes_tag_responses_with_the_scenario_hash():
+    from api import app
+    client = app.test_client()
+    response = client.post('/simulate', json={'scenario': 'recession'})
+    assert response.headers['X-Scenario-Hash'] == registry.get('recession').content_hash
+    assert response.headers['X-Scenario-Hash'] != client.post('/simulate', json={}).headers['X-Scenario-Hash']
+
+    missing = client.post('/simulate', json={'scenario': 'no-such-profile'})
+    assert missing.status_code == 400 and 'no-such-profile' in missing.get_json()['error']
@@ -0,0 +1,51 @@
+import numpy as np
+
+from serialization import pack_columns, rows_from_columns, unpack_columns, write_csv
+
+
+def test_columnar_round_trip():
+    columns = {
+        'age': np.arange(26, 31),
+        'total_savings': np.array([20.0, 31.5, -4.25, np.nan, 1e6 / 3]),
+        'events': ['Initial State', 'Normal Year', 'Job Loss', 'Normal Year', 'Market Crash'],
+        'flags': [True, False, True, True, False],
+    }
+    decoded = unpack_columns(pack_columns(columns))
+
+    assert decoded['age'].dtype == np.dtype('<i4')
+    np.testing.assert_array_equal(decoded['age'], columns['age'])
+    np.testing.assert_array_equal(decoded['total_savings'], columns['total_savings']) # f8 is exact
+    assert decoded['events'] == columns['events']
+    np.testing.assert_array_equal(decoded['flags'], [1, 0, 1, 1, 0])
+
+
+def test_integers_outside_int32_fall_back_to_i8():
+    values = np.array([0, 2**31, -2**40])
+    decoded = unpack_columns(pack_columns({'big': values, 'small': np.array([1, 2, 3])}))
+    assert decoded['big'].dtype == np.dtype('<i8')
+    np.testing.assert_array_equal(decoded['big'], values)
+    assert decoded['small'].dtype == np.dtype('<i4')
+
+
+def test_display_columns_survive_rounding_as_f4():
+    values = np.array([20.0, 1234.5678, 98765.4321, -3.21])
+    decoded = unpack_columns(pack_columns({'savings': values}, display_columns=('savings',)))
+    assert decoded['savings'].dtype == np.dtype('<f4')
+    assert rows_from_columns({'savings': decoded['savings'].astype(float)}, 2) == rows_from_columns({'savings': values}, 2)
+
+
+def test_sensitivity_grid_columns_match_between_formats():
+    from api import app
+    client = app.test_client()
+    body = {'income_min': 5, 'income_max': 15, 'income_step': 1, 'capital_min': 0.1, 'capital_max': 0.5, 'capital_step': 0.1}
+    rows = client.post('/sensitivity_analysis', json=body).get_json()
+    columns = unpack_columns(client.post('/sensitivity_analysis', json=body, headers={'Accept': 'application/x-msgpack'}).data)
+    for name in ('initial_income', 'initial_expenditure_calculated', 'initial_capital'):
+        assert columns[name].dtype == np.dtype('<f8')
+        assert columns[name].tolist() == [row[name] for row in rows], name
+
+
+def test_write_csv_formats_floats_only(tmp_path):
+    path = tmp_path / 'out.csv'
+    write_csv({'age': np.arange(60, 62), 'strategy': ['percentage', 'bucket'], 'ruin': [0.123456789, np.nan]}, str(path))
+    assert path.read_text().splitlines() == ['age,strategy,ruin', '60,percentage,0.123457', '61,bucket,nan']
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from batch_engine import simulate_batch
+from streaming import Histogram, QuantileSketch, RuinCounter, Sink, simulate_streaming
+
+PARAMS = {'current_age': 26, 'future_age': 60}
+QUANTILES = (0.5, 0.75, 0.9, 0.99)
+
+
+def _exact(n_paths, seed):
+    # The paths simulate_streaming draws when the whole run fits in one chunk
+    child = np.random.SeedSequence(seed).spawn(1)[0]
+    years = []
+    result = simulate_batch(n_paths, PARAMS, rng=np.random.default_rng(child),
+                            on_year=lambda year, active, state: years.append((state['total_debt'] > 0) & active))
+    return result, np.array(years)
+
+
+def test_sinks_match_the_exact_run():
+    n_paths = 20000
+    edges = np.linspace(0, 5000, 26)
+    sinks = {'savings': QuantileSketch('total_savings', quantiles=QUANTILES, relative_accuracy=0.01),
+             'histogram': Histogram('final_savings', edges), 'ruin': RuinCounter()}
+    output = simulate_streaming(n_paths, sinks, PARAMS, seed=4, chunk_size=n_paths)
+    result, in_debt = _exact(n_paths, seed=4)
+
+    # Bucket midpoints are within the relative accuracy of the true order statistic
+    for q in QUANTILES:
+        exact = np.quantile(result['final_savings'], q, method='lower')
+        assert output['savings'][f'total_savings_p{q * 100:g}'][-1] == pytest.approx(exact, rel=0.0101), q
+    assert output['savings']['total_savings_mean'][-1] == pytest.approx(result['final_savings'].mean())
+
+    counts = np.bincount(np.clip(np.searchsorted(edges, result['final_savings'], side='right') - 1, 0, 24), minlength=25)
+    np.testing.assert_array_equal(output['histogram']['paths'], counts)
+
+    np.testing.assert_array_equal(output['ruin']['paths_in_debt'], in_debt.sum(axis=1))
+    ever = np.logical_or.accumulate(in_debt, axis=0).sum(axis=1)
+    np.testing.assert_allclose(output['ruin']['ever_in_debt_pct'], ever / n_paths * 100)
+
+
+def test_counts_are_independent_of_chunking():
+    runs = [simulate_streaming(5000, {'histogram': Histogram('debt_years', np.arange(0, 36)), 'ruin': RuinCounter()},
+                               PARAMS, seed=1, chunk_size=chunk_size) for chunk_size in (5000, 700)]
+    for run in runs:
+        assert run['histogram']['paths'].sum() == 5000
+        assert (run['ruin']['paths'] == 5000).all()
+    # Different chunkings draw different paths, but estimate the same rates
+    assert runs[0]['ruin']['ever_in_debt_pct'][-1] == pytest.approx(runs[1]['ruin']['ever_in_debt_pct'][-1], abs=3)
+
+
+def test_sinks_must_report_a_result():
+    with pytest.raises(TypeError):
+        Sink()
+
+    class Incomplete(Sink):
+        def update(self, year, active, state):
+            pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+import sweep
+from distributed import SweepCoordinator
+from sweep import build_design, evaluate_points, run_sweep
+
+DIMENSIONS = {'initial_income': {'low': 10, 'high': 40, 'levels': 4}, 'initial_capital': {'values': [0, 50]}}
+
+
+def test_pooled_sweep_is_independent_of_worker_count(monkeypatch):
+    # Small batches, so the eight points split into several chunks and the pool really runs
+    monkeypatch.setattr(sweep, 'MAX_PATHS_PER_BATCH', 300)
+    tables = [run_sweep(DIMENSIONS, paths_per_point=100, seed=5, workers=workers, attribution=True) for workers in (1, 3)]
+    assert list(tables[0]) == list(tables[1])
+    for name in tables[0]:
+        np.testing.assert_array_equal(tables[0][name], tables[1][name], err_msg=name)
+
+
+def test_factorial_design_covers_every_combination():
+    design = build_design({**DIMENSIONS, 'retirement_age': {'values': [55, 60.4]}})
+    assert len(design['initial_income']) == 4 * 2 * 2
+    assert set(zip(design['initial_income'], design['initial_capital'], design['retirement_age'])) == {
+        (income, capital, age) for income in (10, 20, 30, 40) for capital in (0, 50) for age in (55, 60)}
+    assert design['retirement_age'].dtype == np.int64 # Integer parameters are rounded
+
+
+def test_lhs_design_puts_one_point_in_each_stratum():
+    dimensions = {'initial_income': {'low': 10, 'high': 50}, 'inflation_rate': {'low': 0.04, 'high': 0.08}}
+    design = build_design(dimensions, 'lhs', num_points=20, seed=1)
+    for name, spec in dimensions.items():
+        strata = np.floor((design[name] - spec['low']) / (spec['high'] - spec['low']) * 20)
+        assert sorted(strata) == list(range(20)), name
+    np.testing.assert_array_equal(build_design(dimensions, 'lhs', num_points=20, seed=1)['initial_income'], design['initial_income'])
+
+
+def test_sweep_statistics_follow_the_swept_parameter():
+    columns = run_sweep({'initial_income': {'low': 10, 'high': 40, 'levels': 4}}, paths_per_point=400, seed=2)
+    assert (np.diff(columns['success_rate_pct']) > 0).all()
+    assert (np.diff(columns['debt_probability']) < 0).all()
+    assert (columns['p10_final_savings'] <= columns['median_final_savings']).all()
+
+
+@pytest.mark.parametrize('paths_per_point', [0, -5])
+def test_non_positive_path_counts_are_rejected(paths_per_point):
+    with pytest.raises(ValueError, match='paths_per_point'):
+        run_sweep(DIMENSIONS, paths_per_point=paths_per_point)
+    with pytest.raises(ValueError, match='paths_per_point'):
+        evaluate_points({'initial_income': [20]}, paths_per_point=paths_per_point)
+    with pytest.raises(ValueError):
+        SweepCoordinator(DIMENSIONS, paths_per_cell=paths_per_point)
+
+
+def test_api_rejects_zero_paths_per_point():
+    from api import app
+    response = app.test_client().post('/sweep', json={'dimensions': DIMENSIONS, 'paths_per_point': 0})
+    assert response.status_code == 400
+    assert 'paths_per_point' in response.get_json()['error']
@@ -0,0 +1,22 @@
+"""Production entry point: `gunicorn -c gunicorn.conf.py wsgi:app`.
+
+Importing this module imports the simulation core and builds its lookup tables,
+for the defaults and for every scenario profile present at startup. It also
+imports the NumPy/SciPy engines behind the sweep routes, which api.py would
+otherwise load on the first such request in every worker, and runs each sweep
+path once (sweep.warm_up). With `preload_app` all of this happens once in the
+master before workers fork, and gunicorn.conf.py's pre_fork freezes it for
+sharing.
+"""
+# The API routes import the NumPy engines lazily; importing them here puts them in the pages the workers share
+import decumulation
+import global_sensitivity
+import goal_seek
+import sweep
+from api import app
+from scenarios import registry
+from simulation_core import warm_up
+
+warm_up()
+registry.warm_up()
+sweep.warm_up()